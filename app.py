@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, date
@@ -11,9 +11,18 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///loan_app.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['POLICY_FILE'] = os.getenv('POLICY_FILE')  # Optional JSON decision policy snapshot
+app.config['DECISION_TRACING'] = os.getenv('DECISION_TRACING', '').lower() in ('1', 'true', 'yes')  # Per-stage engine timing
+app.config['DECISION_TRACING_ALLOCATIONS'] = os.getenv('DECISION_TRACING_ALLOCATIONS', '').lower() in ('1', 'true', 'yes')  # Net block growth per stage (process-wide, approximate)
+app.config['DECISION_FAST_REJECT'] = os.getenv('DECISION_FAST_REJECT', '').lower() in ('1', 'true', 'yes')  # Stop at the first hard failure
+app.config['DECISION_JOB_LEASE'] = int(os.getenv('DECISION_JOB_LEASE', '300'))  # Seconds before a silent running job is requeued
+app.config['INSIGHTS_CACHE_SIZE'] = int(os.getenv('INSIGHTS_CACHE_SIZE', '512'))  # Cached Gemini insight templates
+app.config['INSIGHTS_CACHE_TTL'] = int(os.getenv('INSIGHTS_CACHE_TTL', '3600'))  # Seconds
+app.config['GEMINI_MAX_CONCURRENCY'] = int(os.getenv('GEMINI_MAX_CONCURRENCY', '4'))  # Upstream calls in flight
+app.config['GEMINI_TIMEOUT'] = float(os.getenv('GEMINI_TIMEOUT', '10'))  # Seconds per call, including the wait for a slot
 
 # Import database and models
-from database import db
+from database import db, upgrade_schema
 from models import User, Bank, LoanProduct, Application, Manager
 
 # Initialize the database with the app
@@ -21,8 +30,28 @@ db.init_app(app)
 
 # Import services
 from services.loan_calculator import LoanCalculator
-from services.decision_engine import DecisionEngine
 from services.gemini_service import GeminiService
+from services.policy_registry import policy_registry
+from services.decision_worker import decision_worker
+from services.decision_cache import decision_cache
+from services.engine_instrumentation import engine_instrumentation
+from services.insights_cache import insights_cache
+from services.gemini_client import gemini_client
+from services.single_flight import insights_flight
+
+if app.config['DECISION_TRACING']:
+    engine_instrumentation.track_allocations = app.config['DECISION_TRACING_ALLOCATIONS']
+    engine_instrumentation.enable()
+
+decision_worker.fast_reject = app.config['DECISION_FAST_REJECT']
+decision_worker.lease_seconds = app.config['DECISION_JOB_LEASE']
+insights_cache.max_size = app.config['INSIGHTS_CACHE_SIZE']
+insights_cache.ttl_seconds = app.config['INSIGHTS_CACHE_TTL']
+gemini_client.max_concurrency = app.config['GEMINI_MAX_CONCURRENCY']
+gemini_client.timeout = app.config['GEMINI_TIMEOUT']
+
+# Stateless apart from the process-wide Gemini client, so shared by all requests
+gemini_service = GeminiService()
 
 # Hardcoded banks data
 BANKS_DATA = [
@@ -377,6 +406,8 @@ def loan_application():
 
             try:
                 db.session.add(application)
+                # Decision runs in the background worker; the job row commits with the application
+                decision_worker.enqueue(application)
                 db.session.commit()
             except Exception as e:
                 db.session.rollback()
@@ -384,20 +415,13 @@ def loan_application():
                 flash('Failed to submit application. Please try again later.', 'error')
                 return redirect(url_for('loan_application'))
 
-            # Run decision engine (safe handling)
             try:
-                decision_engine = DecisionEngine()
-                decision = decision_engine.evaluate_application(application, user)
-                application.decision = decision.get('status')
-                application.decision_reason = decision.get('reason')
-                application.approval_probability = decision.get('probability')
-                application.suggestions = json.dumps(decision.get('suggestions', []))
-                db.session.commit()
+                # Normally started at startup; this covers servers that skipped it
+                decision_worker.ensure_started(app)
+                decision_worker.notify()
             except Exception as e:
-                db.session.rollback()
-                app.logger.exception("Decision engine error")
-                # Keep application, but mark decision fields empty / notify admin in real app
-                flash('Application submitted but decision processing failed. Manager will review manually.', 'warning')
+                app.logger.exception("Decision worker unavailable")
+                # Job stays queued and is picked up when a worker starts
 
             flash('Application submitted successfully!', 'success')
             session.pop('application_data', None)
@@ -430,6 +454,33 @@ def loan_application():
         # All steps completed, redirect to dashboard
         return redirect(url_for('main_dashboard'))
 
+@app.route('/loan_application/approval_surface')
+@login_required
+def approval_surface():
+    """Approval status and probability over an amount x tenure grid for the logged-in user"""
+    user = User.query.get(session['user_id'])
+    app_data = session.get('application_data', {})
+    loan_type = request.args.get('loan_type') or app_data.get('loan_type')
+    loan_spec = LOAN_TYPES.get(loan_type)
+    if not loan_spec:
+        return jsonify({'status': 'error', 'message': 'Unknown loan type'}), 400
+
+    # Amount rows: the product's range, or a band around the chosen amount
+    steps = min(25, max(2, request.args.get('steps', 10, type=int)))
+    amount = request.args.get('amount', app_data.get('amount'), type=float)
+    low, high = loan_spec['min_amount'], loan_spec['max_amount']
+    if amount:
+        low, high = max(low, amount * 0.5), min(high, amount * 1.5)
+    amounts = sorted({max(10000, round(value / 10000) * 10000)
+                      for value in (low + (high - low) * i / (steps - 1) for i in range(steps))})
+    if amount:
+        amounts = sorted(set(amounts) | {amount})
+    tenures = list(range(loan_spec['min_tenure'], loan_spec['max_tenure'] + 1))
+
+    surface = policy_registry.engine().approval_surface(user, loan_type, amounts, tenures)
+
+    return jsonify({'status': 'success', 'surface': surface})
+
 @app.route('/debug_session')
 @login_required
 def debug_session():
@@ -445,13 +496,34 @@ def debug_session():
 @app.route('/gemini_suggestions')
 @login_required
 def gemini_suggestions():
-    """Get AI suggestions for loan recommendations"""
+    """
+    Get AI suggestions for loan recommendations
+    
+    The rule-based profile and suggestions are returned straight away and the
+    Gemini insights stream from insights_url; ?insights=inline waits for them.
+    """
     user = User.query.get(session['user_id'])
-    gemini_service = GeminiService()
     
-    suggestions = gemini_service.get_loan_suggestions(user)
+    inline = request.args.get('insights') == 'inline'
+    suggestions = gemini_service.get_loan_suggestions(user, include_insights=inline)
+    if suggestions['status'] == 'success' and not inline:
+        suggestions['insights_url'] = url_for('gemini_insights_stream')
     return jsonify(suggestions)
 
+@app.route('/gemini_suggestions/insights')
+@login_required
+def gemini_insights_stream():
+    """Server-Sent Events stream of the Gemini insights text, ending with a 'done' event"""
+    user = User.query.get(session['user_id'])
+    
+    def events():
+        for text in gemini_service.stream_insights(user):
+            yield f"data: {json.dumps({'text': text})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/manager_login', methods=['GET', 'POST'])
 def manager_login():
     """Manager login page"""
@@ -507,7 +579,7 @@ def get_application_details(app_id):
     
     user = User.query.get(application.user_id)
     
-    return jsonify({
+    payload = {
         'status': 'success',
         'application': {
             'id': application.id,
@@ -518,8 +590,11 @@ def get_application_details(app_id):
             'emi': application.emi,
             'approval_probability': application.approval_probability,
             'decision_reason': application.decision_reason,
+            'decision_status': application.decision_jobs[-1].state if application.decision_jobs else None,
             'status': application.status
         },
+        # Metrics and failed checks stored with the decision (None before it is made)
+        'decision_details': application.decision_record,
         'user': {
             'id': user.id,
             'full_name': user.full_name,
@@ -528,6 +603,58 @@ def get_application_details(app_id):
             'monthly_income': user.monthly_income,
             'credit_score': user.credit_score
         }
+    }
+    
+    # ?diagnostics=full re-runs every check, even if the stored decision was a fast reject
+    if request.args.get('diagnostics') == 'full':
+        result = policy_registry.engine().evaluate_application(application, user)
+        payload['diagnostics'] = {
+            'status': result['status'],
+            'reason': result['reason'],
+            'probability': result['probability'],
+            'metrics': result['metrics'],
+            'failed_checks': [check.to_dict() for check in result['failed_checks']],
+            'policy_version': result['policy_version']
+        }
+    
+    return jsonify(payload)
+
+@app.route('/applications/<int:app_id>/schedule')
+@login_required
+def application_schedule(app_id):
+    """Paged amortization schedule for an application (only requested months are computed)"""
+    application = Application.query.get_or_404(app_id)
+
+    # Customers can only view their own applications
+    if application.user_id != session['user_id']:
+        return jsonify({'status': 'error', 'message': 'Unauthorized'}), 403
+
+    total_months = application.tenure_years * 12
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = min(120, max(1, request.args.get('limit', 12, type=int)))
+
+    interest_rate = application.interest_rate
+    if interest_rate is None:
+        bank = next((b for b in BANKS_DATA if b['id'] == application.bank_id), None)
+        interest_rate = bank['interest_rate'] if bank else 7.5
+
+    calculator = LoanCalculator()
+    schedule = calculator.generate_amortization_page(
+        application.amount_requested,
+        interest_rate,
+        application.tenure_years,
+        offset,
+        limit
+    )
+
+    return jsonify({
+        'status': 'success',
+        'application_id': application.id,
+        'interest_rate': interest_rate,
+        'total_months': total_months,
+        'offset': offset,
+        'limit': limit,
+        'schedule': schedule.to_list()
     })
 
 @app.route('/approve_application/<int:app_id>', methods=['POST'])
@@ -567,6 +694,52 @@ def approve_application(app_id):
     db.session.commit()
     return redirect(url_for('manager_dashboard'))
 
+@app.route('/policies')
+@manager_required
+def decision_policies():
+    """Active decision policy snapshot"""
+    snapshot = policy_registry.current()
+    return jsonify({
+        'status': 'success',
+        'version': snapshot.version,
+        'source': snapshot.source,
+        'loaded_at': snapshot.loaded_at.isoformat(),
+        'policy': snapshot.to_dict()
+    })
+
+@app.route('/policies/reload', methods=['POST'])
+@manager_required
+def reload_decision_policies():
+    """Swap in the latest policy snapshot from the policy file or database without a restart"""
+    try:
+        snapshot = load_decision_policies()
+    except (OSError, ValueError, KeyError) as e:
+        app.logger.exception("Policy reload failed")
+        return jsonify({'status': 'error', 'message': f'Policy reload failed: {e}'}), 400
+    
+    return jsonify({'status': 'success', 'version': snapshot.version, 'source': snapshot.source})
+
+@app.route('/metrics')
+@manager_required
+def metrics():
+    """Operational metrics: caches, decision queue, engine stage timings (and net block growth), check selectivity and policy version"""
+    payload = {
+        'status': 'success',
+        'policy_version': policy_registry.current().version,
+        'decision_cache': decision_cache.stats(),
+        'insights_cache': insights_cache.stats(),
+        'gemini_client': gemini_client.stats(),
+        'insights_coalescing': insights_flight.stats(),
+        'decision_jobs': decision_worker.stats(),
+        'annuity_cache': LoanCalculator.annuity_cache_info(),
+        'decision_engine': engine_instrumentation.summary(),
+        'policy_checks': policy_registry.engine().check_statistics()
+    }
+    traces = request.args.get('traces', 0, type=int)
+    if traces > 0:
+        payload['recent_traces'] = engine_instrumentation.recent_traces(min(traces, 50))
+    return jsonify(payload)
+
 @app.route('/update_profile', methods=['GET', 'POST'])
 @login_required
 def update_profile():
@@ -586,6 +759,7 @@ def update_profile():
         user.credit_score = int(request.form['credit_score'])
         
         db.session.commit()
+        decision_cache.invalidate_user(user.id)
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('main_dashboard'))
     
@@ -598,7 +772,31 @@ def loan_products():
     bank = next((b for b in BANKS_DATA if b['id'] == session['bank_id']), None)
     user = User.query.get(session['user_id'])
     
-    return render_template('loan_products.html', bank=bank, user=user, loan_types=LOAN_TYPES)
+    # "You can borrow up to" table per product: one vectorized grid per loan type
+    calculator = LoanCalculator()
+    policies = policy_registry.engine().POLICIES
+    borrowing_limits = {}
+    for loan_type, details in LOAN_TYPES.items():
+        rates = list(details['interest_range'])
+        tenures = list(range(details['min_tenure'], details['max_tenure'] + 1))
+        grid = calculator.eligibility_grid(
+            user.total_monthly_income,
+            user.total_monthly_liabilities,
+            rates,
+            tenures,
+            policies.get(loan_type, policies['personal'])['max_dti']
+        )
+        grid = grid.clip(max=details['max_amount'])
+        borrowing_limits[loan_type] = {
+            'rates': rates,
+            'rows': [
+                {'tenure': tenure, 'amounts': grid[:, column].tolist()}
+                for column, tenure in enumerate(tenures)
+            ]
+        }
+    
+    return render_template('loan_products.html', bank=bank, user=user, loan_types=LOAN_TYPES,
+                         borrowing_limits=borrowing_limits)
 
 @app.route('/logout')
 def logout():
@@ -607,6 +805,20 @@ def logout():
     flash('Logged out successfully', 'info')
     return redirect(url_for('role_selection'))
 
+def load_decision_policies():
+    """Activate decision policies from POLICY_FILE if configured, else the newest DB snapshot"""
+    if app.config.get('POLICY_FILE'):
+        return policy_registry.load_file(app.config['POLICY_FILE'])
+    return policy_registry.load_from_db() or policy_registry.current()
+
+def start_decision_worker(use_reloader=False):
+    """Start the decision worker, requeueing jobs whose lease expired, so queued jobs resume at startup"""
+    # The reloader's watcher process never serves requests; only its child runs the worker
+    if use_reloader and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return False
+    decision_worker.ensure_started(app)
+    return True
+
 def get_loan_suggestions(loan_type, amount):
     """Generate attractive loan suggestions based on loan type and amount"""
     suggestions = []
@@ -647,6 +859,8 @@ def get_loan_suggestions(loan_type, amount):
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+        load_decision_policies()
         
         # Create sample manager accounts
         if not Manager.query.first():
@@ -659,4 +873,5 @@ if __name__ == '__main__':
             db.session.add(manager)
             db.session.commit()
     
+    start_decision_worker(use_reloader=True)
     app.run(debug=True)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the LoanCalculator and DecisionEngine hot paths
+
+Runs offline against deterministic synthetic users and applications built from
+the repo's own models (no database or app context needed):
+
+    python -m benchmarks.bench_services                  # run and compare to baseline
+    python -m benchmarks.bench_services --save-baseline  # record a new baseline
+    python -m benchmarks.bench_services --quick          # shorter timing runs (smoke test)
+
+Each case reports ops/sec (best of several repeats) and its peak traced memory
+per call in bytes (tracemalloc; a memory high-water mark, not an allocation
+count). A case regresses when its ops/sec falls more than
+--threshold below the stored baseline; the script then exits with status 1.
+The baseline records its timing mode, and runs in another mode (e.g. --quick
+against a full baseline, whose short runs are mostly noise) are not compared
+and exit with status 2. Timings are machine-specific, so record a baseline on
+the machine you compare on. Cases whose API does not exist in the tree under
+test (e.g. fast_reject or evaluate_batch on an older commit) are skipped, so a
+baseline can be recorded at an older commit by running this script there.
+"""
+
+import argparse
+import inspect
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+from models import User, Application
+from services.loan_calculator import LoanCalculator
+from services.decision_engine import DecisionEngine
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SEED = 42
+
+# Timing mode name -> (min_time seconds per repeat, repeats)
+TIMING_MODES = {'full': (0.3, 5), 'quick': (0.05, 2)}
+
+LOAN_TYPES = ['personal', 'home', 'auto', 'business', 'education', 'medical']
+RATES = [7.5, 8.2, 6.8, 9.1, 7.8]
+
+def make_users(count, seed=SEED):
+    """Deterministic synthetic customers"""
+    rng = random.Random(seed)
+    users = []
+    for index in range(count):
+        users.append(User(
+            id=index + 1,
+            full_name=f'Bench User {index}',
+            dob=date(rng.randint(1960, 2003), rng.randint(1, 12), rng.randint(1, 28)),
+            monthly_income=float(rng.randrange(8000, 250000, 500)),
+            other_monthly_income=float(rng.choice([0, 0, 0, 5000, 15000])),
+            employment_type=rng.choice(['salaried', 'self-employed', 'business']),
+            employment_tenure_years=round(rng.uniform(0, 20), 1),
+            credit_score=rng.randint(450, 850),
+            existing_emi=float(rng.choice([0, 0, 5000, 12000, 30000])),
+            other_monthly_obligations=float(rng.choice([0, 0, 2000, 8000])),
+            bank_id=rng.randint(1, 5)
+        ))
+    return users
+
+def make_applications(users, seed=SEED):
+    """One deterministic synthetic application per user"""
+    rng = random.Random(seed + 1)
+    applications = []
+    for index, user in enumerate(users):
+        loan_type = rng.choice(LOAN_TYPES)
+        amount = float(rng.randrange(50000, 10000000, 10000))
+        secured = loan_type in ('home', 'auto')
+        applications.append(Application(
+            id=index + 1,
+            user_id=user.id,
+            bank_id=user.bank_id,
+            loan_type=loan_type,
+            amount_requested=amount,
+            tenure_years=rng.randint(1, 30),
+            down_payment=amount * rng.choice([0.1, 0.2, 0.3]) if secured else 0.0,
+            property_value=amount * rng.uniform(1.0, 1.6) if secured else None
+        ))
+    return applications
+
+def make_frame(applications, users):
+    """Columnar view of applications and their users for evaluate_batch"""
+    return {
+        'amount': [a.amount_requested for a in applications],
+        'tenure': [a.tenure_years for a in applications],
+        'loan_type': [a.loan_type for a in applications],
+        'income': [u.total_monthly_income for u in users],
+        'existing_emi': [u.existing_emi for u in users],
+        'other_obligations': [u.other_monthly_obligations for u in users],
+        'credit_score': [u.credit_score for u in users],
+        'dob': [u.dob for u in users],
+        'employment_tenure': [u.employment_tenure_years for u in users],
+        'property_value': [a.property_value for a in applications],
+        'down_payment': [a.down_payment for a in applications]
+    }
+
+def make_loans(count, seed=SEED):
+    """Deterministic (principal, rate, tenure) triples"""
+    rng = random.Random(seed + 2)
+    return [
+        (float(rng.randrange(10000, 10000000, 1000)), rng.choice(RATES), rng.randint(1, 30))
+        for _ in range(count)
+    ]
+
+def build_cases():
+    """
+    Benchmark cases as (name, input size, ops, callable)
+    
+    Each callable performs `ops` operations of the hot path; the input size
+    (number of loans, schedule months, ...) labels the case.
+    """
+    calculator = LoanCalculator()
+    engine = DecisionEngine()
+    has_fast_reject = 'fast_reject' in inspect.signature(engine.evaluate_application).parameters
+    cases = []
+    
+    for size in (100, 10000):
+        loans = make_loans(size)
+        cases.append((
+            'calculate_emi', size, size,
+            lambda loans=loans: [calculator.calculate_emi(p, r, t) for p, r, t in loans]
+        ))
+    
+    for tenure_years in (5, 15, 30):
+        cases.append((
+            'generate_amortization_schedule', tenure_years * 12, 1,
+            lambda t=tenure_years: calculator.generate_amortization_schedule(2500000, 7.5, t)
+        ))
+    
+    for tenure_years in (5, 15, 30):
+        cases.append((
+            'calculate_prepayment_savings', tenure_years * 12, 100,
+            lambda t=tenure_years: [
+                calculator.calculate_prepayment_savings(2500000, 7.5, t, 200000, month)
+                for month in range(1, 101)
+            ]
+        ))
+    
+    for size in (100, 1000):
+        users = make_users(size)
+        pairs = list(zip(make_applications(users), users))
+        cases.append((
+            'DecisionEngine.evaluate_application', size, size,
+            lambda pairs=pairs: [engine.evaluate_application(a, u) for a, u in pairs]
+        ))
+        if not has_fast_reject:
+            continue
+        cases.append((
+            'DecisionEngine.evaluate_application[fast_reject]', size, size,
+            lambda pairs=pairs: [engine.evaluate_application(a, u, fast_reject=True)['status'] for a, u in pairs]
+        ))
+        # Reads every field, as the decision worker does before persisting
+        cases.append((
+            'DecisionEngine.evaluate_application[fast_reject,read]', size, size,
+            lambda pairs=pairs: [dict(engine.evaluate_application(a, u, fast_reject=True)) for a, u in pairs]
+        ))
+    
+    for size in (1000, 100000) if hasattr(engine, 'evaluate_batch') else ():
+        users = make_users(size)
+        frame = make_frame(make_applications(users), users)
+        cases.append((
+            'DecisionEngine.evaluate_batch', size, size,
+            lambda frame=frame: engine.evaluate_batch(frame)
+        ))
+    
+    return cases
+
+def time_case(func, ops, min_time, repeats):
+    """Best ops/sec over `repeats` runs of at least `min_time` seconds each"""
+    best = 0.0
+    for _ in range(repeats):
+        loops = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            func()
+            loops += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, loops * ops / elapsed)
+    return best
+
+def measure_peak_bytes(func, ops):
+    """Peak traced memory above the starting point during one run, per operation (not an allocation count)"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - baseline) / ops
+
+def run(min_time, repeats):
+    results = {}
+    for name, size, ops, func in build_cases():
+        func()  # warm-up
+        key = f'{name}[{size}]'
+        results[key] = {
+            'ops_per_sec': round(time_case(func, ops, min_time, repeats), 1),
+            'peak_bytes_per_op': round(measure_peak_bytes(func, ops), 1)
+        }
+        print(f"{key:<48} {results[key]['ops_per_sec']:>14,.1f} ops/s "
+              f"{results[key]['peak_bytes_per_op']:>12,.1f} B/op")
+    return results
+
+def compare(results, baseline, threshold):
+    """Print the comparison and return the list of regressed cases"""
+    regressions = []
+    print("\nComparison with baseline:")
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            print(f"  {key:<46} (new case)")
+            continue
+        ratio = current['ops_per_sec'] / previous['ops_per_sec'] if previous['ops_per_sec'] else 0
+        flag = ''
+        if ratio < 1 - threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        print(f"  {key:<46} {ratio:>6.2f}x{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark LoanCalculator and DecisionEngine hot paths')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed ops/sec drop before a case counts as a regression (default 0.25)')
+    parser.add_argument('--quick', action='store_true', help='Shorter timing runs')
+    args = parser.parse_args(argv)
+    
+    mode = 'quick' if args.quick else 'full'
+    min_time, repeats = TIMING_MODES[mode]
+    results = run(min_time, repeats)
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'mode': mode, 'min_time': min_time, 'repeats': repeats, 'results': results},
+                      f, indent=2, sort_keys=True)
+        print(f"\nBaseline ({mode} mode) saved to {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    
+    baseline_mode = (baseline.get('mode'), baseline.get('min_time'), baseline.get('repeats'))
+    if baseline_mode != (mode, min_time, repeats):
+        print(f"\nBaseline was recorded in {baseline_mode[0] or 'an unknown'} mode, this run is {mode} mode; "
+              f"not comparing. Re-run in the same mode or record a new baseline with --save-baseline")
+        return 2
+    
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
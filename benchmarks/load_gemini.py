@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Offline load test of the Gemini client against the fake backend
+
+Drives GeminiService insights from many concurrent callers with a
+FakeGeminiBackend of the given latency and failure rate (no network or API
+key needed), and reports per-outcome latency, fallbacks and circuit trips:
+
+    python -m benchmarks.load_gemini                                  # 32 callers, 200ms upstream
+    python -m benchmarks.load_gemini --latency 15 --timeout 2         # upstream hangs past the deadline
+    python -m benchmarks.load_gemini --failure-rate 0.5 --requests 2000
+
+The insights cache is bypassed unless --cache is given, so every request
+reaches the client unless an identical prompt is already in flight.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from services.gemini_client import FakeGeminiBackend, GeminiClient
+from services.gemini_service import GeminiService
+from services.insights_cache import insights_cache
+from services.single_flight import insights_flight
+
+def make_user(index):
+    """Synthetic customer; incomes and scores vary so prompts differ across buckets"""
+    return SimpleNamespace(
+        monthly_income=10000 + (index * 7919) % 190000,
+        credit_score=550 + (index * 37) % 300,
+        employment_type='salaried' if index % 3 else 'self_employed',
+        employment_tenure_years=(index % 12) / 2,
+        existing_emi=(index * 131) % 30000
+    )
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the Gemini client against a fake backend')
+    parser.add_argument('--requests', type=int, default=500, help='Total insight requests')
+    parser.add_argument('--callers', type=int, default=32, help='Concurrent callers (request threads)')
+    parser.add_argument('--latency', type=float, default=0.2, help='Fake upstream latency (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Extra random upstream latency (seconds)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of upstream calls that fail')
+    parser.add_argument('--max-concurrency', type=int, default=4, help='Client concurrency limit')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Client per-call deadline (seconds)')
+    parser.add_argument('--failure-threshold', type=int, default=4,
+                        help='Failures that open the circuit (capped at --max-concurrency)')
+    parser.add_argument('--reset-timeout', type=float, default=5.0, help='Seconds before a half-open trial')
+    parser.add_argument('--cache', action='store_true', help='Serve repeats from the insights cache')
+    parser.add_argument('--seed', type=int, default=42, help='Fake backend random seed')
+    args = parser.parse_args(argv)
+
+    client = GeminiClient(max_concurrency=args.max_concurrency, timeout=args.timeout,
+                          failure_threshold=args.failure_threshold, reset_timeout=args.reset_timeout)
+    client.configure(FakeGeminiBackend(args.latency, args.jitter, args.failure_rate, args.seed))
+    service = GeminiService(client)
+    fallback_text = service._get_fallback_insights
+    if not args.cache:
+        insights_cache.max_size = 0
+
+    def request(index):
+        user = make_user(index)
+        profile = service._analyze_user_profile(user)
+        started = time.perf_counter()
+        insights = service._get_gemini_insights(user, profile)
+        elapsed = time.perf_counter() - started
+        return elapsed, insights == fallback_text(user, profile)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.callers) as pool:
+        results = list(pool.map(request, range(args.requests)))
+    wall = time.perf_counter() - started
+
+    served = [elapsed for elapsed, fallback in results if not fallback]
+    fallbacks = [elapsed for elapsed, fallback in results if fallback]
+    stats = client.stats()
+
+    print(f"{args.requests:,} requests from {args.callers} callers in {wall:.2f}s "
+          f"({args.requests / wall:,.1f} req/s)")
+    print(f"Upstream: {args.latency * 1000:.0f}ms (+{args.jitter * 1000:.0f}ms jitter), "
+          f"{args.failure_rate:.0%} failures, {args.max_concurrency} slots, {args.timeout:g}s deadline")
+    print("=" * 72)
+    print(f"{'Outcome':<12}{'Count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, values in (('model', served), ('fallback', fallbacks)):
+        print(f"{name:<12}{len(values):>8,}{percentile(values, 0.50) * 1000:>10.1f}"
+              f"{percentile(values, 0.95) * 1000:>10.1f}{percentile(values, 0.99) * 1000:>10.1f}"
+              f"{(max(values) if values else 0) * 1000:>10.1f}")
+    print(f"Client: {stats['successes']:,} ok, {stats['failures']:,} failed, {stats['timeouts']:,} timed out, "
+          f"{stats['saturated']:,} saturated, {stats['short_circuited']:,} short-circuited")
+    print(f"Circuit: {stats['circuit']['state']}, tripped {stats['circuit']['trips']} time(s)")
+    coalescing = insights_flight.stats()
+    print(f"Coalesced: {coalescing['coalesced']:,} identical prompts waited on an in-flight call "
+          f"({coalescing['saved_ratio']:.1%} of upstream calls saved)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
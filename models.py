@@ -135,6 +135,8 @@ class Application(db.Model):
     decision_reason = db.Column(db.Text)
     approval_probability = db.Column(db.Float)
     suggestions = db.Column(db.Text)  # JSON string of suggestions
+    policy_version = db.Column(db.String(50))  # Decision policy snapshot used
+    decision_details = db.Column(db.Text)  # Packed metrics and failed checks (services/decision_record.py)
     manager_notes = db.Column(db.Text)
     
     # Calculated Fields
@@ -163,6 +165,63 @@ class Application(db.Model):
     def decision_json(self, value):
         """Set suggestions as JSON string"""
         self.suggestions = json.dumps(value) if value else None
+    
+    @property
+    def decision_record(self):
+        """Stored decision metrics and failed checks, or None if absent or from an older schema"""
+        from services.decision_record import unpack_decision
+        return unpack_decision(self.decision_details)
+
+class DecisionJob(db.Model):
+    """Durable queue entry for running the decision engine on an application"""
+    __tablename__ = 'decision_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    application_id = db.Column(db.Integer, db.ForeignKey('applications.id'), nullable=False)
+    
+    state = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, done, dead
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)  # Not picked up before this (retry backoff)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    application = db.relationship('Application', backref=db.backref('decision_jobs', order_by='DecisionJob.id'))
+    
+    def __repr__(self):
+        return f'<DecisionJob {self.id} - {self.state}>'
+
+class DecisionPolicy(db.Model):
+    """Versioned decision policy snapshots (thresholds, tolerances, scoring weights)"""
+    __tablename__ = 'decision_policies'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.String(50), unique=True, nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON string of the snapshot
+    is_active = db.Column(db.Boolean, default=True)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DecisionPolicy {self.version}>'
+    
+    @property
+    def data_json(self):
+        """Parse snapshot JSON"""
+        if self.data:
+            try:
+                return json.loads(self.data)
+            except:
+                return {}
+        return {}
+    
+    @data_json.setter
+    def data_json(self, value):
+        """Set snapshot as JSON string"""
+        self.data = json.dumps(value) if value else None
 
 class ApplicationLog(db.Model):
     """Audit log for application changes"""
@@ -5,13 +5,18 @@ Run script for Stark Bank Loan Application
 
 import os
 import sys
-from app import app, db
+from app import app, db, load_decision_policies, start_decision_worker
+from database import upgrade_schema
 
 def setup_database():
     """Initialize database tables"""
     with app.app_context():
         db.create_all()
+        upgrade_schema()
         print("Database tables created successfully!")
+        
+        snapshot = load_decision_policies()
+        print(f"Decision policy version: {snapshot.version} ({snapshot.source})")
 
 def create_sample_data():
     """Create sample manager account"""
@@ -50,6 +55,9 @@ if __name__ == '__main__':
     # Create sample data
     create_sample_data()
     
+    # Start the background decision worker
+    start_decision_worker(use_reloader=True)
+    
     print("\n" + "=" * 50)
     print("Application is ready!")
     print("Access the application at: http://localhost:5001")
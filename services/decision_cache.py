@@ -0,0 +1,131 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+# User and Application fields that can change a decision
+USER_FIELDS = ('monthly_income', 'other_monthly_income', 'existing_emi', 'other_monthly_obligations',
+               'credit_score', 'employment_tenure_years', 'dob')
+APPLICATION_FIELDS = ('loan_type', 'amount_requested', 'tenure_years', 'down_payment', 'property_value')
+
+
+class DecisionCache:
+    """
+    TTL + LRU cache of DecisionEngine results keyed on a financial fingerprint
+
+    The fingerprint hashes the decision-relevant User fields, the Application
+    terms, the engine's policy version and today's date (age at maturity moves
+    with the calendar), so near-identical resubmissions reuse the earlier
+    result. Entries are indexed by user so a profile update can drop them.
+    """
+
+    def __init__(self, max_size=2048, ttl_seconds=900):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, user_id, result)
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def fingerprint(self, application, user, policy_version, fast_reject=False):
+        """Stable hash of everything evaluate_application depends on"""
+        payload = {
+            'user': [self._plain(getattr(user, field)) for field in USER_FIELDS],
+            'application': [self._plain(getattr(application, field)) for field in APPLICATION_FIELDS],
+            'policy_version': policy_version,
+            'fast_reject': fast_reject,
+            'as_of': date.today().isoformat()
+        }
+        encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def evaluate(self, engine, application, user, fast_reject=False):
+        """Cached engine.evaluate_application(application, user, fast_reject)"""
+        key = self.fingerprint(application, user, engine.policy_version, fast_reject)
+        result = self.get(key)
+        if result is None:
+            # Materialized, since cached results are shared between threads
+            result = dict(engine.evaluate_application(application, user, fast_reject))
+            self.put(key, user.id, result)
+        return dict(result)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user_id, result = entry
+            if expires_at <= time.monotonic():
+                self._remove(key, user_id)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, user_id, result):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, self._entries[key][1])
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, user_id, result)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest_key, (_, oldest_user, _) = next(iter(self._entries.items()))
+                self._remove(oldest_key, oldest_user)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        """Drop every cached decision for a user (e.g. after a profile update)"""
+        with self._lock:
+            keys = self._keys_by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        """Hit-rate and size metrics for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+    def _remove(self, key, user_id):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+    @staticmethod
+    def _plain(value):
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+
+# Shared by all request handlers and workers in this process
+decision_cache = DecisionCache()
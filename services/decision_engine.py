@@ -1,13 +1,93 @@
 import json
+import math
+import time
 from datetime import date
-from .loan_calculator import LoanCalculator
+
+import numpy as np
+
+from .engine_instrumentation import engine_instrumentation
+from .loan_calculator import LoanCalculator, round_array
+from .policy_rules import CHECKS, CheckSelectivity, compile_policies, format_check_message
+
+class DeferredDecision(dict):
+    """
+    Decision result whose costlier fields are computed on first read
+    
+    `deferred` maps field names to zero-argument callables. Reading a field
+    (by key, get, iteration or copying) computes and stores it once, so a
+    caller that only looks at the status never pays for the rest. Not
+    thread-safe: copy it with dict() before sharing it between threads.
+    """
+    
+    def __init__(self, fields, deferred):
+        super().__init__(fields)
+        self._deferred = deferred
+    
+    def __missing__(self, key):
+        compute = self._deferred.pop(key, None)
+        if compute is None:
+            raise KeyError(key)
+        value = self[key] = compute()
+        return value
+    
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._deferred
+    
+    def get(self, key, default=None):
+        if dict.__contains__(self, key) or key in self._deferred:
+            return self[key]
+        return default
+    
+    def resolve(self):
+        """Compute every deferred field"""
+        deferred = self._deferred
+        while deferred:
+            key, compute = deferred.popitem()
+            self[key] = compute()
+        return self
+    
+    def __iter__(self):
+        if self._deferred:
+            self.resolve()
+        return dict.__iter__(self)
+    
+    def __len__(self):
+        if self._deferred:
+            self.resolve()
+        return dict.__len__(self)
+    
+    def keys(self):
+        if self._deferred:
+            self.resolve()
+        return dict.keys(self)
+    
+    def values(self):
+        if self._deferred:
+            self.resolve()
+        return dict.values(self)
+    
+    def items(self):
+        if self._deferred:
+            self.resolve()
+        return dict.items(self)
+    
+    def copy(self):
+        return dict(self.items())
 
 class DecisionEngine:
     """Loan decision engine with business rules and scoring"""
     
-    def __init__(self):
+    def __init__(self, snapshot=None):
+        """
+        Args:
+            snapshot: Optional PolicySnapshot; its policies, tolerances and
+                scoring weights replace the built-in defaults below
+        """
         self.calculator = LoanCalculator()
         
+        # Per-stage timing and tracing (a no-op unless enabled)
+        self.instrumentation = engine_instrumentation
+        
         # Policy thresholds
         self.POLICIES = {
             "personal": {
@@ -73,6 +153,23 @@ class DecisionEngine:
             }
         }
         
+        # Default interest rate - should come from bank/product
+        self.DEFAULT_INTEREST_RATE = 7.5
+        
+        # Counterfactual terms are quoted in whole steps of this amount
+        self.SUGGESTION_AMOUNT_STEP = 1000
+        
+        # Longest tenure offered per loan type (the application form's limit),
+        # so suggested tenures can actually be applied for
+        self.MAX_OFFERED_TENURE_YEARS = {
+            'personal': 7,
+            'home': 30,
+            'auto': 7,
+            'business': 15,
+            'education': 15,
+            'medical': 5
+        }
+        
         # Tolerances for borderline cases
         self.DTI_TOLERANCE = 0.05
         self.LTV_TOLERANCE = 0.05
@@ -86,81 +183,648 @@ class DecisionEngine:
             'ltv_index': 0.10,
             'income_index': 0.15
         }
+        
+        self.policy_version = 'builtin'
+        if snapshot is not None:
+            self.POLICIES = snapshot.policies_dict()
+            self.DTI_TOLERANCE = snapshot.tolerances['dti']
+            self.LTV_TOLERANCE = snapshot.tolerances['ltv']
+            self.CREDIT_TOLERANCE = snapshot.tolerances['credit']
+            self.SCORING_WEIGHTS = dict(snapshot.scoring_weights)
+            self.policy_version = snapshot.version
+        
+        self.compile_policies()
+    
+    def compile_policies(self):
+        """Compile POLICIES into per-loan-type rule objects; call again after changing thresholds"""
+        self._rules, self._policy_names, self._policy_table = compile_policies(
+            self.POLICIES, self.DTI_TOLERANCE, self.LTV_TOLERANCE, self.CREDIT_TOLERANCE)
+        self._check_stats = {loan_type: CheckSelectivity() for loan_type in self._rules}
     
-    def evaluate_application(self, application, user):
+    def evaluate_application(self, application, user, fast_reject=False):
         """
         Main decision function - evaluates loan application
         
         Args:
             application: Application object
             user: User object
+            fast_reject: Stop at the first hard failure, running checks in
+                measured selectivity order (see _evaluate_fast_reject)
             
         Returns:
             dict with decision details
         """
+        if fast_reject:
+            if self.instrumentation.enabled:
+                with self.instrumentation.trace('evaluate_fast_reject', loan_type=application.loan_type,
+                                                policy_version=self.policy_version) as trace:
+                    result = self._evaluate_fast_reject(application, user)
+                    trace.attributes['status'] = result['status']
+                    trace.attributes['fast_reject'] = result['fast_reject']
+                return result
+            return self._evaluate_fast_reject(application, user)
+        
+        if self.instrumentation.enabled:
+            return self._evaluate_traced(application, user)
+        return self._evaluate_full(application, user)
+    
+    def _evaluate_full(self, application, user, metrics=None, failed_checks=None):
         loan_type = application.loan_type
-        policy = self.POLICIES.get(loan_type, self.POLICIES['personal'])
+        rules = self._rules.get(loan_type, self._rules['personal'])
         
-        # Calculate basic metrics
-        metrics = self._calculate_metrics(application, user, policy)
+        # Calculate basic metrics (keeping any already computed)
+        metrics = self._calculate_metrics(application, user, rules, metrics)
         
-        # Run policy checks
-        failed_checks = self._run_policy_checks(application, user, policy, metrics)
+        # Run policy checks (unless the caller already did)
+        if failed_checks is None:
+            failed_checks = self._run_policy_checks(application, user, rules, metrics)
         
         # Determine decision
-        decision = self._make_decision(failed_checks, metrics, policy)
+        decision = self._make_decision(failed_checks, metrics, rules)
         
         # Generate suggestions
-        suggestions = self._generate_suggestions(failed_checks, application, user, policy, metrics)
+        suggestions = self._generate_suggestions(failed_checks, application, user, rules, metrics)
         
         # Calculate approval probability
         probability = self._calculate_approval_probability(metrics, failed_checks)
         
+        return self._decision_result(decision, probability, suggestions, metrics, failed_checks)
+    
+    def _evaluate_traced(self, application, user):
+        """evaluate_application with every stage timed into the instrumentation histograms"""
+        loan_type = application.loan_type
+        rules = self._rules.get(loan_type, self._rules['personal'])
+        
+        with self.instrumentation.trace('evaluate_application', loan_type=loan_type,
+                                        policy_version=self.policy_version) as trace:
+            with trace.stage('calculate_metrics'):
+                metrics = self._calculate_metrics(application, user, rules)
+            with trace.stage('run_policy_checks'):
+                failed_checks = self._run_policy_checks(application, user, rules, metrics)
+            with trace.stage('make_decision'):
+                decision = self._make_decision(failed_checks, metrics, rules)
+            with trace.stage('generate_suggestions'):
+                suggestions = self._generate_suggestions(failed_checks, application, user, rules, metrics)
+            with trace.stage('calculate_approval_probability'):
+                probability = self._calculate_approval_probability(metrics, failed_checks)
+            trace.attributes['status'] = decision['status']
+        
+        return self._decision_result(decision, probability, suggestions, metrics, failed_checks)
+    
+    def _evaluate_fast_reject(self, application, user):
+        """
+        Run checks cheapest-per-rejection first and stop at the first hard failure
+        
+        Each check only computes the metrics it needs. A hard failure returns
+        a DeferredDecision: REJECTED with that one failed check
+        ('fast_reject': True), while the metrics, its suggestions and the
+        approval probability are only computed when read. The probability is
+        the full evaluation's, so it does not depend on the mode. Otherwise
+        (all checks passed or only borderline failures) the result is exactly
+        the full evaluation's, reusing the metrics computed so far.
+        """
+        rules = self._rules.get(application.loan_type, self._rules['personal'])
+        stats = self._check_stats[rules.loan_type]
+        timed = stats.start()
+        
+        metrics = {}
+        borderline = []
+        for check in stats.order:
+            if timed:
+                started = time.perf_counter_ns()
+                failure = rules.check(check, self._check_input(check, application, user, metrics))
+                stats.record(check, failure, time.perf_counter_ns() - started)
+            else:
+                failure = rules.check(check, self._check_input(check, application, user, metrics))
+            
+            if failure is not None:
+                if not failure.borderline:
+                    return self._fast_rejection(failure, application, user, rules, metrics)
+                borderline.append(failure)
+        
+        # Every check ran, so the failures are known; list them in evaluation order
+        borderline.sort(key=lambda failure: CHECKS.index(failure.check))
+        return self._evaluate_full(application, user, metrics, borderline)
+    
+    def _fast_rejection(self, failure, application, user, rules, partial_metrics):
+        """Fast-reject result with metrics, suggestions and probability deferred until read"""
+        result = None
+        
+        def metrics():
+            return self._calculate_metrics(application, user, rules, partial_metrics)
+        
+        def suggestions():
+            return self._generate_suggestions([failure], application, user, rules, result['metrics'])
+        
+        def probability():
+            # Scored against every failing check, exactly as the full evaluation does
+            failed_checks = self._run_policy_checks(application, user, rules, result['metrics'])
+            return self._calculate_approval_probability(result['metrics'], failed_checks)
+        
+        result = DeferredDecision({
+            'status': 'REJECTED',
+            'reason': failure.message,
+            'failed_checks': [failure],
+            'policy_version': self.policy_version,
+            'fast_reject': True
+        }, {'metrics': metrics, 'suggestions': suggestions, 'probability': probability})
+        return result
+    
+    def _check_input(self, check, application, user, metrics):
+        """Value one policy check tests, computing (and keeping in metrics) only what it needs"""
+        if check == 'min_income':
+            if 'total_income' not in metrics:
+                metrics['total_income'] = user.total_monthly_income
+            return metrics['total_income']
+        if check == 'min_tenure':
+            return user.employment_tenure_years
+        if check == 'min_credit':
+            return user.credit_score
+        if check == 'max_tenure':
+            return application.tenure_years
+        if check == 'age_maturity':
+            metrics['age_at_maturity'] = self.calculator.calculate_age_at_maturity(user.dob, application.tenure_years)
+            return metrics['age_at_maturity']
+        if check == 'ltv':
+            metrics['ltv'] = self.calculator.calculate_ltv(
+                application.amount_requested,
+                application.down_payment or 0,
+                application.property_value or 0
+            ) if application.property_value else None
+            return metrics['ltv']
+        
+        # dti
+        metrics['projected_emi'] = self.calculator.calculate_emi(
+            application.amount_requested,
+            self.DEFAULT_INTEREST_RATE,
+            application.tenure_years
+        )
+        if 'total_income' not in metrics:
+            metrics['total_income'] = user.total_monthly_income
+        metrics['dti'] = self.calculator.calculate_dti(
+            metrics['total_income'],
+            user.existing_emi,
+            user.other_monthly_obligations or 0,
+            metrics['projected_emi']
+        )
+        return metrics['dti']
+    
+    def check_statistics(self):
+        """Per-loan-type check selectivity counters and the current fast-reject order"""
+        return {loan_type: stats.summary() for loan_type, stats in self._check_stats.items()}
+    
+    def _decision_result(self, decision, probability, suggestions, metrics, failed_checks):
         return {
             'status': decision['status'],
             'reason': decision['reason'],
             'probability': probability,
             'suggestions': suggestions,
             'metrics': metrics,
-            'failed_checks': failed_checks
+            'failed_checks': failed_checks,
+            'policy_version': self.policy_version,
+            'fast_reject': False
         }
     
-    def _calculate_metrics(self, application, user, policy):
-        """Calculate all financial metrics"""
-        # Basic calculations
-        projected_emi = self.calculator.calculate_emi(
-            application.amount_requested,
-            7.5,  # Default interest rate - should come from bank/product
-            application.tenure_years
+    def evaluate_batch(self, frame, with_reasons=True):
+        """
+        Vectorized decision function over columnar application data
+        
+        Args:
+            frame: Mapping (dict of arrays, DataFrame, ...) with columns
+                amount, tenure, loan_type, income (total monthly), existing_emi,
+                credit_score, dob, employment_tenure and optionally
+                other_obligations, property_value (NaN/0 if unsecured) and
+                down_payment
+            with_reasons: Build decision reason strings (only failing rows need
+                formatting; approved rows share one constant string)
+            
+        Returns:
+            dict of arrays: status, probability, approved_amount (NaN unless
+            PARTIAL), failed_checks (bitmask over CHECKS), metrics (dict of
+            arrays), policy_version and, if requested, reason (list of str). Decisions and
+            probabilities match evaluate_application row for row; suggestions
+            are not generated.
+        """
+        amount = np.asarray(frame['amount'], dtype=float)
+        rows = amount.shape[0]
+        tenure = np.asarray(frame['tenure'], dtype=int)
+        income = np.asarray(frame['income'], dtype=float)
+        existing_emi = np.asarray(frame['existing_emi'], dtype=float)
+        credit_score = np.asarray(frame['credit_score'], dtype=float)
+        employment_tenure = np.asarray(frame['employment_tenure'], dtype=float)
+        other_obligations = self._optional_column(frame, 'other_obligations', rows, 0.0)
+        property_value = self._optional_column(frame, 'property_value', rows, np.nan)
+        down_payment = np.nan_to_num(self._optional_column(frame, 'down_payment', rows, 0.0))
+        
+        # Per-row policy thresholds, resolved once per distinct loan type
+        policy_names = self._policy_names
+        loan_types, inverse = np.unique(np.asarray(frame['loan_type'], dtype=str), return_inverse=True)
+        type_index = np.array([
+            policy_names.index(t) if t in self._rules else policy_names.index('personal')
+            for t in loan_types
+        ], dtype=int)[inverse]
+        
+        def threshold(key):
+            return self._policy_table[key][type_index]
+        
+        min_income = threshold('min_income')
+        max_dti = threshold('max_dti')
+        max_ltv = threshold('max_ltv')
+        min_credit = threshold('min_credit')
+        min_tenure_years = threshold('min_tenure_years')
+        max_tenure_years = threshold('max_tenure_years')
+        min_age = threshold('min_age')
+        max_age = threshold('max_age')
+        
+        # Metrics
+        projected_emi = self.calculator.calculate_emi_batch(amount, self.DEFAULT_INTEREST_RATE, tenure)
+        dti = self.calculator.calculate_dti_batch(income, existing_emi, other_obligations, projected_emi)
+        has_property = ~np.isnan(property_value) & (property_value != 0)
+        ltv = np.where(has_property,
+                       self.calculator.calculate_ltv_batch(amount, down_payment, np.nan_to_num(property_value)),
+                       np.nan)
+        age_at_maturity = self.calculator.calculate_age_at_maturity_batch(frame['dob'], tenure)
+        
+        credit_index = np.clip((credit_score - 300) / (850 - 300), 0, 1)
+        dti_index = np.clip(1 - (dti / max_dti), 0, 1)
+        tenure_index = np.minimum(1.0, employment_tenure / 5.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ltv_scored = has_property & (ltv != 0) & ~np.isnan(max_ltv)
+            ltv_index = np.where(ltv_scored, np.clip(1 - (ltv / max_ltv), 0, 1), 1.0)
+            income_index = np.where(min_income > 0, np.minimum(1.0, income / (min_income * 1.5)), 1.0)
+        
+        # Policy checks as one boolean column per check
+        with np.errstate(invalid='ignore'):
+            failed = np.column_stack([
+                (age_at_maturity < min_age) | (age_at_maturity > max_age),
+                (min_income > 0) & (income < min_income),
+                employment_tenure < min_tenure_years,
+                credit_score < min_credit,
+                dti > max_dti,
+                ~np.isnan(max_ltv) & (max_ltv != 0) & has_property & (ltv != 0) & (ltv > max_ltv),
+                tenure > max_tenure_years
+            ])
+            borderline = np.zeros_like(failed)
+            borderline[:, CHECKS.index('dti')] = dti <= max_dti + self.DTI_TOLERANCE
+            borderline[:, CHECKS.index('ltv')] = ltv <= max_ltv + self.LTV_TOLERANCE
+            borderline[:, CHECKS.index('min_credit')] = credit_score >= min_credit - self.CREDIT_TOLERANCE
+        borderline &= failed
+        hard_fails = failed & ~borderline
+        
+        failed_mask = (failed * (1 << np.arange(len(CHECKS)))).sum(axis=1).astype(np.uint8)
+        failed_count = failed.sum(axis=1)
+        has_hard_fail = hard_fails.any(axis=1)
+        
+        status = np.where(failed_count == 0, 'APPROVED',
+                          np.where(has_hard_fail, 'REJECTED', 'PARTIAL')).astype(object)
+        approved_amount = np.where(status == 'PARTIAL',
+                                   np.minimum(projected_emi * 60, income * 20), np.nan)
+        
+        # Approval probability
+        score = (
+            credit_index * self.SCORING_WEIGHTS['credit_index'] +
+            dti_index * self.SCORING_WEIGHTS['dti_index'] +
+            tenure_index * self.SCORING_WEIGHTS['tenure_index'] +
+            ltv_index * self.SCORING_WEIGHTS['ltv_index'] +
+            income_index * self.SCORING_WEIGHTS['income_index']
         )
+        penalized = round_array(np.maximum(0, score * 100 - failed_count * 15), 1)
+        probability = np.where(failed_count == 0, 95.0, penalized)
+        
+        metrics = {
+            'projected_emi': projected_emi,
+            'total_income': income,
+            'total_liabilities': existing_emi + other_obligations,
+            'dti': dti,
+            'ltv': ltv,
+            'age_at_maturity': age_at_maturity,
+            'credit_index': credit_index,
+            'dti_index': dti_index,
+            'tenure_index': tenure_index,
+            'ltv_index': ltv_index,
+            'income_index': income_index
+        }
+        
+        result = {
+            'policy_version': self.policy_version,
+            'status': status,
+            'probability': probability,
+            'approved_amount': approved_amount,
+            'failed_checks': failed_mask,
+            'metrics': metrics
+        }
+        
+        if with_reasons:
+            values = {
+                'age_maturity': age_at_maturity,
+                'min_income': income,
+                'min_tenure': employment_tenure,
+                'min_credit': credit_score,
+                'dti': dti,
+                'ltv': ltv,
+                'max_tenure': tenure
+            }
+            reasons = ['All policy checks passed'] * rows
+            
+            # Only rows that failed something need their messages formatted
+            for row in np.flatnonzero(failed_count):
+                policy = self.POLICIES[policy_names[type_index[row]]]
+                reported = hard_fails[row] if has_hard_fail[row] else borderline[row]
+                messages = [
+                    self._batch_check_message(check, values[check][row], policy)
+                    for check, flagged in zip(CHECKS, reported) if flagged
+                ]
+                if has_hard_fail[row]:
+                    reasons[row] = '; '.join(messages)
+                else:
+                    reasons[row] = 'Borderline case - partial approval possible: ' + '; '.join(messages)
+            result['reason'] = reasons
+        
+        return result
+    
+    def _optional_column(self, frame, name, rows, default):
+        """Column as float array, or a constant column if absent"""
+        column = frame.get(name) if hasattr(frame, 'get') else None
+        if column is None:
+            return np.full(rows, default)
+        column = np.array([default if v is None else v for v in column], dtype=float) \
+            if not isinstance(column, np.ndarray) else column.astype(float)
+        return column
+    
+    def _batch_check_message(self, check, value, policy):
+        """Format a batch failure with the same value types as the per-object path"""
+        if check == 'age_maturity':
+            value = int(value)
+            limit = policy['min_age'] if value < policy['min_age'] else policy['max_age']
+            return format_check_message(check, value, limit)
+        if check in ('min_credit', 'max_tenure'):
+            value = int(value)
+        else:
+            value = float(value)
+        thresholds = {
+            'min_income': 'min_income',
+            'min_tenure': 'min_tenure_years',
+            'min_credit': 'min_credit',
+            'dti': 'max_dti',
+            'ltv': 'max_ltv',
+            'max_tenure': 'max_tenure_years'
+        }
+        return format_check_message(check, value, policy[thresholds[check]])
+    
+    def max_approvable_terms(self, user, loan_type, tenures=None, amounts=None,
+                             down_payment=0, property_value=None):
+        """
+        Counterfactual solver: the best terms that pass every policy check
+        
+        Solves the DTI and LTV limits in closed form instead of re-running
+        evaluate_application, then verifies each candidate with the same
+        rounded metrics the checks use. Tenures are capped at the loan type's
+        longest offered tenure as well as the policy's.
+        
+        Args:
+            user: User object
+            loan_type: Loan type whose policy applies
+            tenures: Whole-year tenures to report the max amount for
+                (default 1 up to the loan type's max tenure)
+            amounts: Loan amounts to find the minimum tenure for
+            down_payment: Down payment for the LTV check
+            property_value: Property value (LTV is only checked when set)
+            
+        Returns:
+            dict with blocking_checks (FailedCheck that no choice of amount
+            or tenure can fix), max_amount_by_tenure (largest amount in whole
+            SUGGESTION_AMOUNT_STEP steps, 0 if none passes) and
+            min_tenure_by_amount (shortest allowed whole-year tenure, None if
+            none)
+        """
+        rules = self._rules.get(loan_type, self._rules['personal'])
+        down_payment = down_payment or 0
+        if tenures is None:
+            tenures = range(1, self._max_tenure(rules) + 1)
+        
+        # Income, employment and credit checks do not depend on the terms
+        blocking_checks = self._blocking_checks(rules, user)
+        
+        return {
+            'loan_type': rules.loan_type,
+            'interest_rate': self.DEFAULT_INTEREST_RATE,
+            'blocking_checks': blocking_checks,
+            'max_amount_by_tenure': [
+                {
+                    'tenure_years': int(tenure),
+                    'max_amount': 0.0 if blocking_checks else
+                    self._max_amount_for_tenure(rules, user, int(tenure), down_payment, property_value)
+                }
+                for tenure in tenures
+            ],
+            'min_tenure_by_amount': [
+                {
+                    'amount': float(amount),
+                    'min_tenure_years': None if blocking_checks else
+                    self._min_tenure_for_amount(rules, user, float(amount), down_payment, property_value)
+                }
+                for amount in (amounts if amounts is not None else [])
+            ]
+        }
+    
+    def approval_surface(self, user, loan_type, amounts, tenures, down_payment=0, property_value=None):
+        """
+        Decision status and approval probability over an amount x tenure grid
+        
+        Runs the whole grid through evaluate_batch in one vectorized pass, so
+        each cell matches evaluate_application for those terms.
+        
+        Args:
+            user: User object
+            loan_type: Loan type whose policy applies
+            amounts: Candidate loan amounts (grid rows)
+            tenures: Candidate whole-year tenures (grid columns)
+            down_payment: Down payment applied to every cell
+            property_value: Property value (LTV is only checked when set)
+            
+        Returns:
+            dict with amounts, tenures and status / probability as nested
+            lists indexed [amount][tenure]
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        tenures = np.asarray(tenures, dtype=int)
+        grid_amount, grid_tenure = np.meshgrid(amounts, tenures, indexing='ij')
+        rows = grid_amount.size
+        
+        frame = {
+            'amount': grid_amount.ravel(),
+            'tenure': grid_tenure.ravel(),
+            'loan_type': np.full(rows, loan_type),
+            'income': np.full(rows, user.total_monthly_income, dtype=float),
+            'existing_emi': np.full(rows, user.existing_emi, dtype=float),
+            'other_obligations': np.full(rows, user.other_monthly_obligations or 0, dtype=float),
+            'credit_score': np.full(rows, user.credit_score, dtype=float),
+            'employment_tenure': np.full(rows, user.employment_tenure_years, dtype=float),
+            'dob': np.full(rows, user.dob, dtype='datetime64[D]'),
+            'property_value': np.full(rows, property_value or np.nan, dtype=float),
+            'down_payment': np.full(rows, down_payment or 0, dtype=float)
+        }
+        result = self.evaluate_batch(frame, with_reasons=False)
+        
+        return {
+            'loan_type': loan_type,
+            'interest_rate': self.DEFAULT_INTEREST_RATE,
+            'policy_version': result['policy_version'],
+            'amounts': amounts.tolist(),
+            'tenures': tenures.tolist(),
+            'status': result['status'].reshape(grid_amount.shape).tolist(),
+            'probability': result['probability'].reshape(grid_amount.shape).tolist()
+        }
+    
+    def _blocking_checks(self, rules, user):
+        """Failed checks that no choice of amount or tenure can fix (income, employment, credit)"""
+        return rules.evaluate(rules.min_age, user.total_monthly_income, user.employment_tenure_years,
+                              user.credit_score, 0.0, None, 0)
+    
+    def _max_tenure(self, rules):
+        """Longest tenure that passes the policy and is offered for the loan type"""
+        offered = self.MAX_OFFERED_TENURE_YEARS.get(rules.loan_type, 30)
+        return int(min(rules.max_tenure_years or offered, offered))
+    
+    def _tenure_allowed(self, rules, user, tenure_years):
+        """Whether a tenure is offered and passes the age at maturity and max tenure checks"""
+        if tenure_years > self._max_tenure(rules):
+            return False
+        age_at_maturity = self.calculator.calculate_age_at_maturity(user.dob, tenure_years)
+        return rules.min_age <= age_at_maturity <= rules.max_age
+    
+    def _term_passes(self, rules, user, amount, tenure_years, down_payment, property_value):
+        """Whether loan terms pass the DTI and LTV checks"""
+        emi = self.calculator.calculate_emi(amount, self.DEFAULT_INTEREST_RATE, tenure_years)
+        dti = self.calculator.calculate_dti(user.total_monthly_income, user.existing_emi,
+                                            user.other_monthly_obligations or 0, emi)
+        if dti > rules.max_dti:
+            return False
+        if rules.max_ltv and property_value:
+            return self.calculator.calculate_ltv(amount, down_payment, property_value) <= rules.max_ltv
+        return True
+    
+    def _min_down_payment_increase(self, rules, application):
+        """Smallest extra down payment (in whole steps) that passes the LTV check as evaluated"""
+        step = self.SUGGESTION_AMOUNT_STEP
+        amount = application.amount_requested
+        down_payment = application.down_payment or 0
+        property_value = application.property_value
+        
+        def passes(increase):
+            ltv = self.calculator.calculate_ltv(amount, down_payment + increase, property_value)
+            return rules.check('ltv', ltv) is None
+        
+        # The check compares LTV rounded to 3 decimals, so the limit has the same slack
+        shortfall = amount - down_payment - (rules.max_ltv + 0.0005) * property_value
+        increase = max(step, math.ceil(shortfall / step) * step)
+        while not passes(increase):
+            increase += step
+        while increase > step and passes(increase - step):
+            increase -= step
+        return increase
+    
+    def _max_amount_for_tenure(self, rules, user, tenure_years, down_payment, property_value):
+        """Largest amount (in whole steps) that passes at this tenure, 0 if none"""
+        if not self._tenure_allowed(rules, user, tenure_years):
+            return 0.0
+        step = self.SUGGESTION_AMOUNT_STEP
+        obligations = user.existing_emi + (user.other_monthly_obligations or 0)
+        amount = self.calculator.calculate_loan_eligibility(
+            user.total_monthly_income, obligations, self.DEFAULT_INTEREST_RATE, tenure_years, rules.max_dti + 0.0005)
+        if rules.max_ltv and property_value:
+            amount = min(amount, down_payment + (rules.max_ltv + 0.0005) * property_value)
+        amount = math.floor(amount / step) * step
+        
+        for _ in range(3):
+            if amount <= 0 or self._term_passes(rules, user, amount, tenure_years, down_payment, property_value):
+                break
+            amount -= step
+        
+        if amount > 0 and self._term_passes(rules, user, amount, tenure_years, down_payment, property_value):
+            return float(amount)
+        return 0.0
+    
+    def _min_tenure_for_amount(self, rules, user, amount, down_payment, property_value):
+        """Shortest allowed whole-year tenure at which this amount passes, None if none"""
+        if rules.max_ltv and property_value and \
+                self.calculator.calculate_ltv(amount, down_payment, property_value) > rules.max_ltv:
+            return None
+        max_tenure = self._max_tenure(rules)
+        obligations = user.existing_emi + (user.other_monthly_obligations or 0)
+        target_emi = (rules.max_dti + 0.0005) * user.total_monthly_income - obligations
+        monthly_rate = self.DEFAULT_INTEREST_RATE / 100 / 12
+        if target_emi <= 0 or amount * monthly_rate >= target_emi:
+            return None
+        
+        # Closed-form estimate n = -ln(1 - P*r/EMI) / ln(1 + r); EMI falls as tenure
+        # grows, so the first allowed tenure that passes from there on is the minimum
+        if monthly_rate > 0:
+            months = -math.log1p(-amount * monthly_rate / target_emi) / math.log1p(monthly_rate)
+        else:
+            months = amount / target_emi
+        for tenure_years in range(max(1, math.ceil(months / 12) - 1), max_tenure + 1):
+            if self._tenure_allowed(rules, user, tenure_years) and \
+                    self._term_passes(rules, user, amount, tenure_years, down_payment, property_value):
+                return tenure_years
+        return None
+    
+    def _calculate_metrics(self, application, user, rules, known=None):
+        """
+        Calculate all financial metrics
+        
+        Args:
+            known: Metrics already computed for this application (e.g. by
+                _check_input), reused instead of recomputed
+        """
+        known = known or {}
+        
+        # Basic calculations
+        if 'projected_emi' in known:
+            projected_emi = known['projected_emi']
+        else:
+            projected_emi = self.calculator.calculate_emi(
+                application.amount_requested,
+                self.DEFAULT_INTEREST_RATE,
+                application.tenure_years
+            )
         
-        total_income = user.total_monthly_income
+        total_income = known['total_income'] if 'total_income' in known else user.total_monthly_income
         total_liabilities = user.total_monthly_liabilities
         
-        dti = self.calculator.calculate_dti(
-            total_income,
-            user.existing_emi,
-            user.other_monthly_obligations or 0,
-            projected_emi
-        )
+        if 'dti' in known:
+            dti = known['dti']
+        else:
+            dti = self.calculator.calculate_dti(
+                total_income,
+                user.existing_emi,
+                user.other_monthly_obligations or 0,
+                projected_emi
+            )
         
-        ltv = self.calculator.calculate_ltv(
-            application.amount_requested,
-            application.down_payment or 0,
-            application.property_value or 0
-        ) if application.property_value else None
+        if 'ltv' in known:
+            ltv = known['ltv']
+        else:
+            ltv = self.calculator.calculate_ltv(
+                application.amount_requested,
+                application.down_payment or 0,
+                application.property_value or 0
+            ) if application.property_value else None
         
-        age_at_maturity = self.calculator.calculate_age_at_maturity(
-            user.dob,
-            application.tenure_years
-        )
+        if 'age_at_maturity' in known:
+            age_at_maturity = known['age_at_maturity']
+        else:
+            age_at_maturity = self.calculator.calculate_age_at_maturity(
+                user.dob,
+                application.tenure_years
+            )
         
         # Calculate indices for scoring
         credit_index = self._normalize_credit_score(user.credit_score)
-        dti_index = self._calculate_dti_index(dti, policy['max_dti'])
+        dti_index = self._calculate_dti_index(dti, rules.max_dti)
         tenure_index = self._calculate_tenure_index(user.employment_tenure_years)
-        ltv_index = self._calculate_ltv_index(ltv, policy.get('max_ltv')) if ltv else 1.0
-        income_index = self._calculate_income_index(total_income, policy['min_income'])
+        ltv_index = self._calculate_ltv_index(ltv, rules.max_ltv) if ltv else 1.0
+        income_index = self._calculate_income_index(total_income, rules.min_income)
         
         return {
             'projected_emi': projected_emi,
@@ -176,83 +840,19 @@ class DecisionEngine:
             'income_index': income_index
         }
     
-    def _run_policy_checks(self, application, user, policy, metrics):
-        """Run all policy checks and return failed ones"""
-        failed_checks = []
-        
-        # Age check
-        if metrics['age_at_maturity'] < policy['min_age']:
-            failed_checks.append({
-                'check': 'age_maturity',
-                'value': metrics['age_at_maturity'],
-                'threshold': policy['min_age'],
-                'message': f"Age at maturity ({metrics['age_at_maturity']}) is below minimum ({policy['min_age']})"
-            })
-        elif metrics['age_at_maturity'] > policy['max_age']:
-            failed_checks.append({
-                'check': 'age_maturity',
-                'value': metrics['age_at_maturity'],
-                'threshold': policy['max_age'],
-                'message': f"Age at maturity ({metrics['age_at_maturity']}) exceeds maximum ({policy['max_age']})"
-            })
-        
-        # Income check
-        if policy['min_income'] > 0 and metrics['total_income'] < policy['min_income']:
-            failed_checks.append({
-                'check': 'min_income',
-                'value': metrics['total_income'],
-                'threshold': policy['min_income'],
-                'message': f"Monthly income (₹{metrics['total_income']:,.0f}) is below minimum (₹{policy['min_income']:,.0f})"
-            })
-        
-        # Employment tenure check
-        if user.employment_tenure_years < policy['min_tenure_years']:
-            failed_checks.append({
-                'check': 'min_tenure',
-                'value': user.employment_tenure_years,
-                'threshold': policy['min_tenure_years'],
-                'message': f"Employment tenure ({user.employment_tenure_years} years) is below minimum ({policy['min_tenure_years']} years)"
-            })
-        
-        # Credit score check
-        if user.credit_score < policy['min_credit']:
-            failed_checks.append({
-                'check': 'min_credit',
-                'value': user.credit_score,
-                'threshold': policy['min_credit'],
-                'message': f"Credit score ({user.credit_score}) is below minimum ({policy['min_credit']})"
-            })
-        
-        # DTI check
-        if metrics['dti'] > policy['max_dti']:
-            failed_checks.append({
-                'check': 'dti',
-                'value': metrics['dti'],
-                'threshold': policy['max_dti'],
-                'message': f"Debt-to-Income ratio ({metrics['dti']:.1%}) exceeds maximum ({policy['max_dti']:.1%})"
-            })
-        
-        # LTV check (for secured loans)
-        if policy['max_ltv'] and metrics['ltv'] and metrics['ltv'] > policy['max_ltv']:
-            failed_checks.append({
-                'check': 'ltv',
-                'value': metrics['ltv'],
-                'threshold': policy['max_ltv'],
-                'message': f"Loan-to-Value ratio ({metrics['ltv']:.1%}) exceeds maximum ({policy['max_ltv']:.1%})"
-            })
-        
-        # Tenure check
-        if 'max_tenure_years' in policy and application.tenure_years > policy['max_tenure_years']:
-            failed_checks.append({
-                'check': 'max_tenure',
-                'value': application.tenure_years,
-                'threshold': policy['max_tenure_years'],
-                'message': f"Loan tenure ({application.tenure_years} years) exceeds maximum ({policy['max_tenure_years']} years)"
-            })
-        
-        return failed_checks
+    def _run_policy_checks(self, application, user, rules, metrics):
+        """Run all policy checks and return failed ones (messages render lazily)"""
+        return rules.evaluate(
+            metrics['age_at_maturity'],
+            metrics['total_income'],
+            user.employment_tenure_years,
+            user.credit_score,
+            metrics['dti'],
+            metrics['ltv'],
+            application.tenure_years
+        )
     
-    def _make_decision(self, failed_checks, metrics, policy):
+    def _make_decision(self, failed_checks, metrics, rules):
         """Make final decision based on failed checks"""
         if not failed_checks:
             return {
@@ -265,13 +865,13 @@ class DecisionEngine:
         hard_fails = []
         
         for check in failed_checks:
-            if self._is_borderline(check, policy):
+            if check.borderline:
                 borderline.append(check)
             else:
                 hard_fails.append(check)
         
         if hard_fails:
-            reasons = [check['message'] for check in hard_fails]
+            reasons = [check.message for check in hard_fails]
             return {
                 'status': 'REJECTED',
                 'reason': '; '.join(reasons)
@@ -284,7 +884,7 @@ class DecisionEngine:
                 metrics['total_income'] * 20  # 20x monthly income cap
             )
             
-            reasons = [check['message'] for check in borderline]
+            reasons = [check.message for check in borderline]
             return {
                 'status': 'PARTIAL',
                 'reason': 'Borderline case - partial approval possible: ' + '; '.join(reasons),
@@ -296,39 +896,13 @@ class DecisionEngine:
             'reason': 'Policy checks failed'
         }
     
-    def _is_borderline(self, check, policy):
-        """Check if a failed check is borderline (within tolerance)"""
-        check_type = check['check']
-        
-        if check_type == 'dti' and check['value'] <= policy['max_dti'] + self.DTI_TOLERANCE:
-            return True
-        elif check_type == 'ltv' and policy['max_ltv'] and check['value'] <= policy['max_ltv'] + self.LTV_TOLERANCE:
-            return True
-        elif check_type == 'min_credit' and check['value'] >= policy['min_credit'] - self.CREDIT_TOLERANCE:
-            return True
-        
-        return False
-    
-    def _generate_suggestions(self, failed_checks, application, user, policy, metrics):
+    def _generate_suggestions(self, failed_checks, application, user, rules, metrics):
         """Generate actionable suggestions to improve approval chances"""
         suggestions = []
         
         for check in failed_checks:
             if check['check'] == 'dti':
-                suggestions.append({
-                    'type': 'reduce_tenure',
-                    'title': 'Reduce Loan Tenure',
-                    'description': f"Reduce tenure by 2-3 years to lower EMI and improve DTI ratio",
-                    'impact': 'High',
-                    'actionable': True
-                })
-                suggestions.append({
-                    'type': 'reduce_amount',
-                    'title': 'Reduce Loan Amount',
-                    'description': f"Consider reducing loan amount by 10-15% to improve approval chances",
-                    'impact': 'High',
-                    'actionable': True
-                })
+                suggestions.extend(self._dti_suggestions(application, user, rules))
             
             elif check['check'] == 'min_income':
                 suggestions.append({
@@ -340,10 +914,11 @@ class DecisionEngine:
                 })
             
             elif check['check'] == 'ltv':
+                increase = self._min_down_payment_increase(rules, application)
                 suggestions.append({
                     'type': 'increase_down_payment',
                     'title': 'Increase Down Payment',
-                    'description': f"Increase down payment by ₹{int(application.property_value * 0.1):,} to improve LTV ratio",
+                    'description': f"Increase down payment by ₹{increase:,} to bring LTV within {rules.max_ltv:.0%}",
                     'impact': 'High',
                     'actionable': True
                 })
@@ -369,6 +944,44 @@ class DecisionEngine:
         
         return suggestions
     
+    def _dti_suggestions(self, application, user, rules):
+        """Exact amount and tenure changes that fix a DTI failure"""
+        terms = self.max_approvable_terms(user, rules.loan_type, [application.tenure_years],
+                                          [application.amount_requested], application.down_payment,
+                                          application.property_value)
+        max_amount = terms['max_amount_by_tenure'][0]['max_amount']
+        min_tenure = terms['min_tenure_by_amount'][0]['min_tenure_years']
+        suggestions = []
+        
+        if min_tenure is not None and min_tenure > application.tenure_years:
+            emi = self.calculator.calculate_emi(application.amount_requested, self.DEFAULT_INTEREST_RATE, min_tenure)
+            suggestions.append({
+                'type': 'extend_tenure',
+                'title': 'Extend Loan Tenure',
+                'description': f"Extend tenure to {min_tenure} years to lower EMI to ₹{emi:,.0f} and bring DTI within {rules.max_dti:.0%}",
+                'impact': 'High',
+                'actionable': True
+            })
+        
+        if max_amount > 0:
+            suggestions.append({
+                'type': 'reduce_amount',
+                'title': 'Reduce Loan Amount',
+                'description': f"Reduce loan amount to ₹{max_amount:,.0f} to pass at {application.tenure_years} years",
+                'impact': 'High',
+                'actionable': True
+            })
+        elif not suggestions:
+            suggestions.append({
+                'type': 'reduce_amount',
+                'title': 'Reduce Loan Amount',
+                'description': "Consider reducing loan amount by 10-15% to improve approval chances",
+                'impact': 'High',
+                'actionable': True
+            })
+        
+        return suggestions
+    
     def _calculate_approval_probability(self, metrics, failed_checks):
         """Calculate approval probability based on scoring"""
         if not failed_checks:
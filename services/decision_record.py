@@ -0,0 +1,74 @@
+import json
+
+from .policy_rules import format_check_message
+
+# Bump when the packed layout changes; older records then unpack to None
+DECISION_RECORD_VERSION = 1
+
+# Metric order in a packed record (missing metrics, e.g. ltv without a property value, are null)
+METRIC_FIELDS = ('projected_emi', 'total_income', 'total_liabilities', 'dti', 'ltv', 'age_at_maturity',
+                 'credit_index', 'dti_index', 'tenure_index', 'ltv_index', 'income_index')
+
+# Scoring indices are stored to this many decimal places
+INDEX_PRECISION = 4
+
+
+def pack_decision(result):
+    """
+    Compact JSON of a DecisionEngine result's metrics and failed checks
+
+    Layout (version 1): {"v": 1, "m": [metric values in METRIC_FIELDS order],
+    "f": [[check, value, threshold, borderline], ...], "x": 1 for a fast reject}.
+    Check messages are not stored; unpack_decision renders them again.
+    """
+    metrics = result.get('metrics') or {}
+    values = []
+    for field in METRIC_FIELDS:
+        value = metrics.get(field)
+        if value is not None and field.endswith('_index'):
+            value = round(value, INDEX_PRECISION)
+        values.append(value)
+
+    record = {
+        'v': DECISION_RECORD_VERSION,
+        'm': values,
+        'f': [[check.check, check.value, check.threshold, int(check.borderline)]
+              for check in result.get('failed_checks') or []]
+    }
+    if result.get('fast_reject'):
+        record['x'] = 1
+    return json.dumps(record, separators=(',', ':'))
+
+
+def unpack_decision(packed):
+    """
+    Metrics and failed checks from a pack_decision string
+
+    Returns:
+        dict with metrics, failed_checks (check, value, threshold, borderline,
+        message) and fast_reject, or None for a missing, unreadable or
+        other-version record
+    """
+    if not packed:
+        return None
+    try:
+        record = json.loads(packed)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or record.get('v') != DECISION_RECORD_VERSION:
+        return None
+
+    return {
+        'metrics': {field: value for field, value in zip(METRIC_FIELDS, record['m']) if value is not None},
+        'failed_checks': [
+            {
+                'check': check,
+                'value': value,
+                'threshold': threshold,
+                'borderline': bool(borderline),
+                'message': format_check_message(check, value, threshold)
+            }
+            for check, value, threshold, borderline in record['f']
+        ],
+        'fast_reject': bool(record.get('x'))
+    }
@@ -0,0 +1,242 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from .decision_cache import decision_cache
+from .decision_record import pack_decision
+from .policy_registry import policy_registry
+
+
+class DecisionWorker:
+    """
+    Background decision pipeline backed by the decision_jobs table
+
+    Submitting an application only inserts a DecisionJob row in the same
+    transaction; a dispatcher thread claims queued jobs and runs the decision
+    engine on a thread pool, filling in decision, decision_reason,
+    approval_probability, suggestions and the packed decision_details
+    (metrics and failed checks). With fast_reject set, the engine stops at
+    the first hard policy failure (see DecisionEngine evaluate_application).
+    Failed jobs are retried with exponential backoff and moved to the 'dead'
+    state after max_attempts. Jobs are claimed with a conditional UPDATE, so
+    several processes can share one database without running a job twice.
+    A running job holds a lease: its updated_at is refreshed while it is
+    being processed, and only jobs whose lease is older than lease_seconds
+    (their process died mid-decision) are requeued.
+    """
+
+    def __init__(self, max_workers=2, poll_interval=2.0, max_attempts=3, retry_delay=5.0, batch_size=20,
+                 fast_reject=False, lease_seconds=300.0):
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+        self.fast_reject = fast_reject
+        self.lease_seconds = lease_seconds
+        self._in_flight = set()
+        self._last_maintenance = 0.0
+        self._app = None
+        self._executor = None
+        self._dispatcher = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._dispatcher is not None and self._dispatcher.is_alive()
+
+    def enqueue(self, application):
+        """Add a decision job for the application to the current session (caller commits)"""
+        from database import db
+        from models import DecisionJob
+
+        job = DecisionJob(application=application, state='queued', attempts=0,
+                          available_at=datetime.utcnow())
+        db.session.add(job)
+        return job
+
+    def notify(self):
+        """Wake the dispatcher after new jobs were committed"""
+        self._wakeup.set()
+
+    def ensure_started(self, app):
+        """Start the worker once per process (at app startup, or lazily from a request as a fallback)"""
+        if self.running:
+            return
+        with self._lock:
+            if self.running:
+                return
+            self._app = app
+            self._stopping.clear()
+            self._recover_stale_jobs()
+            self._last_maintenance = time.monotonic()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='decision-worker')
+            self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                                name='decision-dispatcher', daemon=True)
+            self._dispatcher.start()
+
+    def stop(self, wait=True):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._dispatcher:
+            self._dispatcher.join(timeout=self.poll_interval * 2)
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+        self._dispatcher = None
+        self._executor = None
+
+    def stats(self):
+        """Job counts per state"""
+        from database import db
+        from models import DecisionJob
+
+        with self._app_context():
+            rows = db.session.query(DecisionJob.state, db.func.count(DecisionJob.id)) \
+                .group_by(DecisionJob.state).all()
+        return {state: count for state, count in rows}
+
+    def run_pending(self):
+        """Process every job that is due, synchronously (for scripts and tests)"""
+        processed = 0
+        while True:
+            job_ids = self._claim_jobs()
+            if not job_ids:
+                return processed
+            for job_id in job_ids:
+                self._process(job_id)
+                processed += 1
+
+    def _app_context(self):
+        if self._app is None:
+            from flask import current_app
+            self._app = current_app._get_current_object()
+        return self._app.app_context()
+
+    def _recover_stale_jobs(self):
+        """Requeue 'running' jobs whose lease expired (their process stopped mid-decision)"""
+        from database import db
+        from models import DecisionJob
+
+        expired = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        with self._app_context():
+            recovered = DecisionJob.query.filter(
+                DecisionJob.state == 'running',
+                DecisionJob.updated_at < expired
+            ).update({'state': 'queued', 'available_at': datetime.utcnow()}, synchronize_session=False)
+            db.session.commit()
+        return recovered
+
+    def _renew_leases(self):
+        """Refresh updated_at of the jobs this process is working on"""
+        from database import db
+        from models import DecisionJob
+
+        with self._lock:
+            job_ids = list(self._in_flight)
+        if not job_ids:
+            return
+        with self._app_context():
+            DecisionJob.query.filter(DecisionJob.id.in_(job_ids), DecisionJob.state == 'running') \
+                .update({'updated_at': datetime.utcnow()}, synchronize_session=False)
+            db.session.commit()
+
+    def _maintain(self):
+        """Renew this process's leases and requeue expired ones, a few times per lease period"""
+        now = time.monotonic()
+        if now - self._last_maintenance < self.lease_seconds / 3:
+            return
+        self._last_maintenance = now
+        self._renew_leases()
+        self._recover_stale_jobs()
+
+    def _job_finished(self, job_id):
+        with self._lock:
+            self._in_flight.discard(job_id)
+
+    def _dispatch_loop(self):
+        while not self._stopping.is_set():
+            try:
+                self._maintain()
+                job_ids = self._claim_jobs()
+            except Exception:
+                self._app.logger.exception("Decision dispatcher failed to claim jobs")
+                job_ids = []
+
+            for job_id in job_ids:
+                with self._lock:
+                    self._in_flight.add(job_id)
+                future = self._executor.submit(self._process, job_id)
+                future.add_done_callback(lambda _, job_id=job_id: self._job_finished(job_id))
+
+            if not job_ids:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _claim_jobs(self):
+        """Atomically mark due queued jobs as running and return their ids"""
+        from database import db
+        from models import DecisionJob
+
+        claimed = []
+        with self._app_context():
+            candidates = db.session.query(DecisionJob.id).filter(
+                DecisionJob.state == 'queued',
+                DecisionJob.available_at <= datetime.utcnow()
+            ).order_by(DecisionJob.id).limit(self.batch_size).all()
+
+            for (job_id,) in candidates:
+                updated = DecisionJob.query.filter_by(id=job_id, state='queued').update(
+                    {'state': 'running', 'attempts': DecisionJob.attempts + 1,
+                     'updated_at': datetime.utcnow()},
+                    synchronize_session=False
+                )
+                if updated:
+                    claimed.append(job_id)
+            db.session.commit()
+        return claimed
+
+    def _process(self, job_id):
+        from database import db
+        from models import DecisionJob, User
+
+        with self._app_context():
+            job = DecisionJob.query.get(job_id)
+            if job is None:
+                return
+            try:
+                application = job.application
+                user = User.query.get(application.user_id)
+
+                decision = decision_cache.evaluate(policy_registry.engine(), application, user,
+                                                  self.fast_reject)
+                application.decision = decision.get('status')
+                application.decision_reason = decision.get('reason')
+                application.approval_probability = decision.get('probability')
+                application.suggestions = json.dumps(decision.get('suggestions', []))
+                application.policy_version = decision.get('policy_version')
+                application.decision_details = pack_decision(decision)
+
+                job.state = 'done'
+                job.last_error = None
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._app.logger.exception("Decision job %s failed", job_id)
+                job = DecisionJob.query.get(job_id)
+                job.last_error = f'{type(e).__name__}: {e}'
+                if job.attempts >= self.max_attempts:
+                    job.state = 'dead'
+                else:
+                    job.state = 'queued'
+                    delay = self.retry_delay * (2 ** (job.attempts - 1))
+                    job.available_at = datetime.utcnow() + timedelta(seconds=delay)
+                db.session.commit()
+
+
+# Shared by all request handlers in this process
+decision_worker = DecisionWorker()
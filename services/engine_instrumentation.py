@@ -0,0 +1,271 @@
+import os
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from collections import deque
+
+# Upper bounds of the latency histogram buckets, in microseconds
+LATENCY_BUCKETS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+class StageHistogram:
+    """Latency histogram plus allocation totals for one engine stage"""
+
+    __slots__ = ('counts', 'count', 'total_us', 'max_us', 'allocation_samples', 'total_allocations',
+                 'max_allocations', 'total_allocated_bytes')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+        self.allocation_samples = 0
+        self.total_allocations = 0
+        self.max_allocations = 0
+        self.total_allocated_bytes = 0
+
+    def record(self, elapsed_us, allocations=None):
+        """Add one sample; allocations is (blocks, bytes), or None when they were not measured"""
+        self.counts[bisect_left(LATENCY_BUCKETS_US, elapsed_us)] += 1
+        self.count += 1
+        self.total_us += elapsed_us
+        self.max_us = max(self.max_us, elapsed_us)
+        if allocations is not None:
+            blocks, allocated_bytes = allocations
+            self.allocation_samples += 1
+            self.total_allocations += blocks
+            self.max_allocations = max(self.max_allocations, blocks)
+            self.total_allocated_bytes += allocated_bytes
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_US[index]) if index < len(LATENCY_BUCKETS_US) else self.max_us
+        return self.max_us
+
+    def summary(self):
+        bounds = [f'<={bound}us' for bound in LATENCY_BUCKETS_US] + [f'>{LATENCY_BUCKETS_US[-1]}us']
+        samples = self.allocation_samples
+        return {
+            'count': self.count,
+            'mean_us': round(self.total_us / self.count, 1) if self.count else 0.0,
+            'p50_us': self.percentile(0.50),
+            'p95_us': self.percentile(0.95),
+            'p99_us': self.percentile(0.99),
+            'max_us': round(self.max_us, 1),
+            'allocation_samples': samples,
+            'mean_allocations': round(self.total_allocations / samples, 1) if samples else None,
+            'max_allocations': self.max_allocations if samples else None,
+            'mean_allocated_bytes': round(self.total_allocated_bytes / samples) if samples else None,
+            'buckets': {bound: n for bound, n in zip(bounds, self.counts) if n}
+        }
+
+
+class Trace:
+    """One traced engine call: a root span with a child span per stage"""
+
+    __slots__ = ('instrumentation', 'name', 'trace_id', 'attributes', 'spans',
+                 '_started', '_started_ns', '_tracing')
+
+    def __init__(self, instrumentation, name, attributes):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.trace_id = os.urandom(8).hex()
+        self.attributes = attributes
+        self.spans = []
+
+    def __enter__(self):
+        self._tracing = self.instrumentation._start_allocation_tracing()
+        self._started = time.time()
+        self._started_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_us = (time.perf_counter_ns() - self._started_ns) / 1000
+        allocations = self.instrumentation._stop_allocation_tracing() if self._tracing else None
+        self.instrumentation._finish(self, elapsed_us, allocations, exc)
+        return False
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+
+class _Stage:
+    """Times one stage of a Trace and records it into that stage's histogram"""
+
+    __slots__ = ('trace', 'name', '_started', '_started_ns', '_snapshot')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self._snapshot = self.trace.instrumentation._allocation_snapshot() if self.trace._tracing else None
+        self._started = time.time()
+        self._started_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_us = (time.perf_counter_ns() - self._started_ns) / 1000
+        allocations = None
+        if self._snapshot is not None:
+            allocations = self.trace.instrumentation._allocations_since(self._snapshot)
+        self.trace.instrumentation._record(self.name, elapsed_us, allocations)
+        self.trace.spans.append({
+            'name': self.name,
+            'start': self._started,
+            'duration_us': round(elapsed_us, 1),
+            'allocations': allocations[0] if allocations else None,
+            'allocated_bytes': allocations[1] if allocations else None,
+            'error': exc_type.__name__ if exc_type else None
+        })
+        return False
+
+
+class EngineInstrumentation:
+    """
+    Optional per-stage timing and tracing for DecisionEngine
+
+    Disabled by default. DecisionEngine checks `enabled` once per call, so the
+    cost when disabled is a single attribute test. When enabled, each stage's
+    wall time goes into a StageHistogram and each call becomes a trace of
+    spans. Recent traces are kept in memory and passed to span listeners
+    (e.g. a bridge to a tracing backend).
+
+    With track_allocations set, each stage also records its allocations:
+    the memory blocks (and their bytes) allocated during the stage that are
+    still alive at its end, from tracemalloc snapshot statistics taken
+    around it. tracemalloc runs only for the duration of one traced call at
+    a time, so snapshots stay small; calls that overlap a traced one (or run
+    while tracemalloc is started elsewhere) are timed without allocation
+    samples. Temporaries freed inside a stage are not counted, and other
+    threads' allocations during a traced call land in its snapshots.
+    """
+
+    # Snapshots themselves and this module's bookkeeping are not the engine's allocations
+    _ALLOCATION_FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__)
+    )
+
+    def __init__(self, enabled=False, track_allocations=False, max_traces=100):
+        self.enabled = enabled
+        self.track_allocations = track_allocations
+        self._histograms = {}
+        self._recent = deque(maxlen=max_traces)
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._allocation_lock = threading.Lock()
+        self.traces = 0
+        self.errors = 0
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def add_span_listener(self, listener):
+        """Call listener(trace_dict) after every traced engine call"""
+        self._listeners.append(listener)
+
+    def trace(self, name, **attributes):
+        return Trace(self, name, attributes)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._recent.clear()
+            self.traces = 0
+            self.errors = 0
+
+    def recent_traces(self, limit=10):
+        with self._lock:
+            return list(self._recent)[-limit:]
+
+    def summary(self):
+        """Per-stage latency and allocation summary for the metrics endpoint"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'track_allocations': self.track_allocations,
+                'traces': self.traces,
+                'errors': self.errors,
+                'stages': {name: histogram.summary() for name, histogram in self._histograms.items()}
+            }
+
+    def _start_allocation_tracing(self):
+        """Start tracemalloc for one traced call; False if not tracked or tracemalloc is already in use"""
+        if not self.track_allocations or not self._allocation_lock.acquire(blocking=False):
+            return False
+        if tracemalloc.is_tracing():
+            self._allocation_lock.release()
+            return False
+        tracemalloc.start()
+        return True
+
+    def _stop_allocation_tracing(self):
+        """(blocks, bytes) allocated since tracing started and still alive; stops tracemalloc"""
+        try:
+            return self._allocations_since(None)
+        finally:
+            tracemalloc.stop()
+            self._allocation_lock.release()
+
+    def _allocation_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(self._ALLOCATION_FILTERS)
+
+    def _allocations_since(self, snapshot):
+        """(blocks, bytes) allocated since the snapshot (or since tracing started) and still alive"""
+        current = self._allocation_snapshot()
+        if snapshot is None:
+            return len(current.traces), sum(trace.size for trace in current.traces)
+        allocations = allocated_bytes = 0
+        for stat in current.compare_to(snapshot, 'lineno'):
+            if stat.count_diff > 0:
+                allocations += stat.count_diff
+            if stat.size_diff > 0:
+                allocated_bytes += stat.size_diff
+        return allocations, allocated_bytes
+
+    def _record(self, name, elapsed_us, allocations):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = StageHistogram()
+            histogram.record(elapsed_us, allocations)
+
+    def _finish(self, trace, elapsed_us, allocations, exc):
+        self._record(trace.name, elapsed_us, allocations)
+        span = {
+            'trace_id': trace.trace_id,
+            'name': trace.name,
+            'start': trace._started,
+            'duration_us': round(elapsed_us, 1),
+            'allocations': allocations[0] if allocations else None,
+            'allocated_bytes': allocations[1] if allocations else None,
+            'attributes': trace.attributes,
+            'error': f'{type(exc).__name__}: {exc}' if exc else None,
+            'spans': trace.spans
+        }
+        with self._lock:
+            self.traces += 1
+            if exc:
+                self.errors += 1
+            self._recent.append(span)
+        for listener in self._listeners:
+            try:
+                listener(span)
+            except Exception:
+                pass
+
+
+# Shared by every DecisionEngine in this process
+engine_instrumentation = EngineInstrumentation()
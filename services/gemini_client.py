@@ -0,0 +1,365 @@
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from types import SimpleNamespace
+
+
+class GeminiUnavailable(Exception):
+    """No insight could be generated: not configured, circuit open, saturated, timed out or failed"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    After failure_threshold failures in a row the circuit opens and calls are
+    refused without touching the upstream. After reset_timeout seconds one
+    trial call is let through (half-open); its success closes the circuit,
+    its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back a half-open trial that never reached the upstream"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.trips += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class FakeGeminiBackend:
+    """
+    Offline stand-in for GenerativeModel with configurable latency and failures
+
+    generate_content sleeps latency seconds (plus up to jitter), then either
+    raises (with probability failure_rate) or returns an object with .text,
+    so timeouts, saturation and the circuit breaker can be exercised without
+    network access. With stream=True it yields the text a few words at a
+    time, spreading the latency across the chunks.
+    """
+
+    def __init__(self, latency=0.2, jitter=0.0, failure_rate=0.0, seed=None, text=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.text = text
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.failure_rate
+        text = self.text or (
+            "**Financial Health Assessment:**\n"
+            "With a monthly income of [MONTHLY_INCOME] and a credit score of [CREDIT_SCORE], "
+            "your profile supports most secured and unsecured loans.\n\n"
+            "**Improvement Areas:**\n"
+            "- Keep existing EMIs ([EXISTING_EMI]) below 30% of income\n"
+        )
+        if stream:
+            return self._stream(text, delay, failed)
+        time.sleep(delay)
+        if failed:
+            raise RuntimeError('Fake Gemini backend failure')
+        return SimpleNamespace(text=text)
+
+    def _stream(self, text, delay, failed):
+        words = text.split(' ')
+        chunks = [' '.join(words[start:start + 4]) + ' ' for start in range(0, len(words), 4)]
+        chunks[-1] = chunks[-1][:-1]
+        # Most of the latency is time to the first chunk, as with a real model
+        time.sleep(delay / 2)
+        if failed:
+            raise RuntimeError('Fake Gemini backend failure')
+        for chunk in chunks:
+            yield SimpleNamespace(text=chunk)
+            time.sleep(delay / 2 / len(chunks))
+
+
+class GeminiClient:
+    """
+    Process-wide Gemini client with bounded concurrency, deadlines and a circuit breaker
+
+    The model is configured once and reused. Calls run on a pool of
+    max_concurrency threads; a caller waits at most `timeout` seconds for a
+    free slot and its response, then gets GeminiUnavailable while a stuck
+    upstream call keeps its slot until it returns, so a slow upstream never
+    takes more than max_concurrency threads. Timeouts, errors and waits for
+    a slot that expire count as failures for the circuit breaker, whose
+    threshold is capped at max_concurrency so that one round of hung calls
+    opens it; while it is open calls fail at once. When every slot is held
+    by a call its caller already gave up on, new calls fail at once too.
+    """
+
+    def __init__(self, model_name='gemini-pro', max_concurrency=4, timeout=10.0,
+                 failure_threshold=4, reset_timeout=30.0):
+        """
+        Args:
+            model_name: Gemini model to configure
+            max_concurrency: Upstream calls in flight at once
+            timeout: Seconds a caller waits for a slot and a response together
+            failure_threshold: Consecutive failures that open the circuit
+                (at most max_concurrency)
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.backend = None
+        self._executor = None
+        self._slots = None
+        self._configured = False
+        self._abandoned = 0  # Slots held by upstream calls whose caller timed out
+        self._lock = threading.Lock()
+        self.counts = {'calls': 0, 'successes': 0, 'failures': 0, 'timeouts': 0,
+                       'short_circuited': 0, 'saturated': 0}
+
+    @property
+    def available(self):
+        self.configure()
+        return self.backend is not None
+
+    def configure(self, backend=None):
+        """
+        Set up the backend once: the given one, a FakeGeminiBackend when
+        GEMINI_BACKEND=fake, or a GenerativeModel when GOOGLE_API_KEY is set
+        """
+        if self._configured and backend is None:
+            return
+        with self._lock:
+            if self._configured and backend is None:
+                return
+            if backend is None:
+                backend = self._backend_from_env()
+            self.backend = backend
+            self.breaker.failure_threshold = min(self.breaker.failure_threshold, self.max_concurrency)
+            self._slots = threading.BoundedSemaphore(self.max_concurrency)
+            self._abandoned = 0
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='gemini')
+            self._configured = True
+
+    def _backend_from_env(self):
+        if os.getenv('GEMINI_BACKEND', '').lower() == 'fake':
+            return FakeGeminiBackend(
+                latency=float(os.getenv('GEMINI_FAKE_LATENCY', '0.2')),
+                jitter=float(os.getenv('GEMINI_FAKE_JITTER', '0')),
+                failure_rate=float(os.getenv('GEMINI_FAKE_FAILURE_RATE', '0'))
+            )
+
+        api_key = os.getenv('GOOGLE_API_KEY')
+        if not api_key or api_key == 'your-api-key-here':
+            return None
+        try:
+            import google.generativeai as genai
+
+            genai.configure(api_key=api_key)
+            return genai.GenerativeModel(self.model_name)
+        except Exception as e:
+            print(f"Gemini API configuration failed: {e}")
+            return None
+
+    def generate(self, prompt, timeout=None):
+        """
+        Response text for prompt
+
+        Raises:
+            GeminiUnavailable: Not configured, circuit open, no free slot or
+                no response within the deadline, or the upstream call failed
+        """
+        if not self.available:
+            raise GeminiUnavailable('Gemini is not configured')
+        self._count('calls')
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise GeminiUnavailable('Gemini circuit is open')
+
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        self._acquire_slot(deadline - time.monotonic())
+        future, call = self._submit(self.backend.generate_content, prompt)
+
+        try:
+            text = future.result(timeout=max(0.0, deadline - time.monotonic())).text
+        except FutureTimeout:
+            self._abandon(future, call)
+            self._count('timeouts')
+            self.breaker.record_failure()
+            raise GeminiUnavailable('Gemini call timed out')
+        except Exception as e:
+            self._count('failures')
+            self.breaker.record_failure()
+            raise GeminiUnavailable(f'Gemini call failed: {e}') from e
+
+        self._count('successes')
+        self.breaker.record_success()
+        return text
+
+    def stream(self, prompt, timeout=None):
+        """
+        Yield response text chunks as the model produces them
+
+        Same limits as generate, except that `timeout` bounds each wait: for
+        a slot and the first chunk, then between chunks.
+
+        Raises:
+            GeminiUnavailable: As for generate, possibly after some chunks
+        """
+        if not self.available:
+            raise GeminiUnavailable('Gemini is not configured')
+        self._count('calls')
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise GeminiUnavailable('Gemini circuit is open')
+
+        wait = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + wait
+        self._acquire_slot(wait)
+
+        chunks = queue.Queue()
+
+        def produce():
+            try:
+                for part in self.backend.generate_content(prompt, stream=True):
+                    chunks.put(('chunk', part.text))
+                chunks.put(('done', None))
+            except Exception as e:
+                chunks.put(('error', e))
+
+        future, call = self._submit(produce)
+
+        try:
+            while True:
+                try:
+                    kind, value = chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    self._abandon(future, call)
+                    self._count('timeouts')
+                    self.breaker.record_failure()
+                    raise GeminiUnavailable('Gemini stream timed out')
+                if kind == 'done':
+                    break
+                if kind == 'error':
+                    self._count('failures')
+                    self.breaker.record_failure()
+                    raise GeminiUnavailable(f'Gemini call failed: {value}') from value
+                deadline = time.monotonic() + wait
+                yield value
+        except GeneratorExit:
+            # The reader went away; the upstream call finishes on its own
+            self.breaker.release_trial()
+            raise
+
+        self._count('successes')
+        self.breaker.record_success()
+
+    def _acquire_slot(self, wait):
+        """
+        Take a slot, waiting at most `wait` seconds
+
+        Raises:
+            GeminiUnavailable: No slot in time; counted as saturated and as a
+                breaker failure, since slots only stay taken while the
+                upstream is slow. Fails without waiting when every slot is
+                held by an abandoned call.
+        """
+        if self._abandoned >= self.max_concurrency:
+            acquired = self._slots.acquire(blocking=False)
+        else:
+            acquired = self._slots.acquire(timeout=max(0.0, wait))
+        if not acquired:
+            self._count('saturated')
+            self.breaker.record_failure()
+            raise GeminiUnavailable('All Gemini slots are busy')
+
+    def _submit(self, func, *args):
+        """Run func on the pool; its slot is released when it returns"""
+        call = {'abandoned': False}
+
+        def finished(_):
+            self._slots.release()
+            with self._lock:
+                if call['abandoned']:
+                    self._abandoned -= 1
+
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(finished)
+        return future, call
+
+    def _abandon(self, future, call):
+        """Note that the caller stopped waiting for a call that still holds its slot"""
+        with self._lock:
+            if not future.done():
+                call['abandoned'] = True
+                self._abandoned += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+            abandoned = self._abandoned
+        return dict(
+            counts,
+            abandoned_slots=abandoned,
+            backend=type(self.backend).__name__ if self.backend is not None else None,
+            max_concurrency=self.max_concurrency,
+            timeout_seconds=self.timeout,
+            circuit={
+                'state': self.breaker.state,
+                'consecutive_failures': self.breaker.failures,
+                'trips': self.breaker.trips
+            }
+        )
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+
+# Shared by every GeminiService in this process
+gemini_client = GeminiClient()
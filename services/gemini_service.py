@@ -1,24 +1,38 @@
 import json
-import google.generativeai as genai
+from bisect import bisect_left, bisect_right
 from datetime import datetime
-import os
+from itertools import product
+from types import SimpleNamespace
+
+from .gemini_client import GeminiUnavailable, gemini_client
+from .insights_cache import insights_cache
+from .single_flight import insights_flight
+
+# Profile categories by lower threshold (value >= threshold), highest first
+CREDIT_CATEGORIES = ((750, 'excellent'), (700, 'good'), (650, 'fair'), (600, 'poor'))
+INCOME_CATEGORIES = ((100000, 'high'), (50000, 'medium_high'), (25000, 'medium'), (15000, 'low_medium'))
+STABILITY_CATEGORIES = ((5, 'very_stable'), (3, 'stable'), (1, 'moderate'))
+
+# Risk points for existing EMI / monthly income at or below each bound (2 above the last)
+DTI_RISK_POINTS = ((0.3, 5), (0.5, 4), (0.7, 3))
+
+# Per-loan-type eligibility minimums
+MIN_CREDIT_REQUIREMENTS = {
+    'personal': 600, 'home': 620, 'auto': 600,
+    'business': 640, 'education': 550, 'medical': 0
+}
+MIN_INCOME_REQUIREMENTS = {
+    'personal': 12000, 'home': 25000, 'auto': 18000,
+    'business': 35000, 'education': 0, 'medical': 8000
+}
+MIN_ELIGIBLE_TENURE_YEARS = 1
 
 class GeminiService:
     """Service for Gemini AI integration and loan recommendations"""
     
-    def __init__(self):
-        # Configure Gemini API (you'll need to set GOOGLE_API_KEY environment variable)
-        api_key = os.getenv('GOOGLE_API_KEY')
-        if api_key and api_key != 'your-api-key-here':
-            try:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-pro')
-                self.api_available = True
-            except Exception as e:
-                print(f"Gemini API configuration failed: {e}")
-                self.api_available = False
-        else:
-            self.api_available = False
+    def __init__(self, client=None):
+        # Gemini calls go through the process-wide client (configured from GOOGLE_API_KEY on first use)
+        self.client = client or gemini_client
         
         # Hardcoded loan data for suggestions
         self.LOAN_DATA = {
@@ -77,20 +91,85 @@ class GeminiService:
                 'requirements': ['Medical reports', 'Hospital bills', 'Income proof', 'Identity documents']
             }
         }
+        
+        self._build_profile_table()
+    
+    def _build_profile_table(self):
+        """
+        Precompute the profile and ranked suggestions for every band combination
+        
+        Band edges are every credit score, income, employment tenure and
+        existing EMI threshold the profile and eligibility rules use, so all
+        users in one (credit, income, tenure, EMI) cell share a profile and a
+        ranked suggestion list. A request is then one lookup plus rendering
+        personalized_reason. Call again after changing LOAN_DATA.
+        """
+        self._credit_edges = sorted({threshold for threshold, _ in CREDIT_CATEGORIES} |
+                                    {value for value in MIN_CREDIT_REQUIREMENTS.values() if value > 0})
+        self._income_edges = sorted({threshold for threshold, _ in INCOME_CATEGORIES} |
+                                    {value for value in MIN_INCOME_REQUIREMENTS.values() if value > 0})
+        self._tenure_edges = sorted({threshold for threshold, _ in STABILITY_CATEGORIES} |
+                                    {MIN_ELIGIBLE_TENURE_YEARS})
+        self._dti_bounds = [bound for bound, _ in DTI_RISK_POINTS]
+        
+        self._profile_table = {}
+        for key in product(range(len(self._credit_edges) + 1), range(len(self._income_edges) + 1),
+                           range(len(self._tenure_edges) + 1), range(len(self._dti_bounds) + 2)):
+            profile = self._compute_user_profile(self._band_representative(*key))
+            self._profile_table[key] = (profile, self._rank_suggestions(profile))
+    
+    def _band_representative(self, credit_band, income_band, tenure_band, dti_band):
+        """A user inside the given bands (see _profile_key)"""
+        income = self._income_edges[income_band - 1] if income_band else self._income_edges[0] / 2
+        if dti_band:
+            # Midpoint of the band's ratio range (the last band is open-ended)
+            bounds = [0.0] + self._dti_bounds + [self._dti_bounds[-1] + 0.3]
+            existing_emi = income * (bounds[dti_band - 1] + bounds[dti_band]) / 2
+        else:
+            existing_emi = 0
+        return SimpleNamespace(
+            credit_score=self._credit_edges[credit_band - 1] if credit_band else self._credit_edges[0] - 1,
+            monthly_income=income,
+            employment_tenure_years=self._tenure_edges[tenure_band - 1] if tenure_band else 0,
+            existing_emi=existing_emi
+        )
+    
+    def _profile_key(self, user):
+        """Profile table cell of a user"""
+        if user.existing_emi and user.monthly_income:
+            dti_band = 1 + bisect_left(self._dti_bounds, user.existing_emi / user.monthly_income)
+        else:
+            dti_band = 0
+        return (
+            bisect_right(self._credit_edges, user.credit_score),
+            bisect_right(self._income_edges, user.monthly_income),
+            bisect_right(self._tenure_edges, user.employment_tenure_years),
+            dti_band
+        )
     
-    def get_loan_suggestions(self, user):
+    @property
+    def api_available(self):
+        return self.client.available
+    
+    def get_loan_suggestions(self, user, include_insights=True):
         """
         Get personalized loan suggestions based on user profile
+        
+        Args:
+            user: User object
+            include_insights: Wait for the Gemini insights; when False they are
+                left as None, to be fetched with stream_insights
         """
         try:
-            # Analyze user profile
-            user_profile = self._analyze_user_profile(user)
+            # Analyze user profile and rank suggestions (one profile table lookup)
+            profile, ranked = self._profile_table[self._profile_key(user)]
+            user_profile = self._copy_profile(profile)
             
-            # Get suggestions based on profile
-            suggestions = self._generate_personalized_suggestions(user, user_profile)
+            # Personalize the ranked suggestions
+            suggestions = self._personalize_suggestions(user, ranked)
             
             # Use Gemini for additional insights
-            gemini_insights = self._get_gemini_insights(user, user_profile)
+            gemini_insights = self._get_gemini_insights(user, user_profile) if include_insights else None
             
             return {
                 'status': 'success',
@@ -108,7 +187,15 @@ class GeminiService:
             }
     
     def _analyze_user_profile(self, user):
-        """Analyze user profile and categorize them"""
+        """Analyze user profile and categorize them (from the profile table)"""
+        profile, _ = self._profile_table[self._profile_key(user)]
+        return self._copy_profile(profile)
+    
+    def _copy_profile(self, profile):
+        return dict(profile, loan_eligibility=dict(profile['loan_eligibility']))
+    
+    def _compute_user_profile(self, user):
+        """Categorize a user directly from the rules (used to fill the profile table)"""
         profile = {
             'credit_category': self._categorize_credit_score(user.credit_score),
             'income_category': self._categorize_income(user.monthly_income),
@@ -121,40 +208,24 @@ class GeminiService:
     
     def _categorize_credit_score(self, credit_score):
         """Categorize credit score"""
-        if credit_score >= 750:
-            return 'excellent'
-        elif credit_score >= 700:
-            return 'good'
-        elif credit_score >= 650:
-            return 'fair'
-        elif credit_score >= 600:
-            return 'poor'
-        else:
-            return 'very_poor'
+        for threshold, category in CREDIT_CATEGORIES:
+            if credit_score >= threshold:
+                return category
+        return 'very_poor'
     
     def _categorize_income(self, monthly_income):
         """Categorize monthly income"""
-        if monthly_income >= 100000:
-            return 'high'
-        elif monthly_income >= 50000:
-            return 'medium_high'
-        elif monthly_income >= 25000:
-            return 'medium'
-        elif monthly_income >= 15000:
-            return 'low_medium'
-        else:
-            return 'low'
+        for threshold, category in INCOME_CATEGORIES:
+            if monthly_income >= threshold:
+                return category
+        return 'low'
     
     def _assess_employment_stability(self, user):
         """Assess employment stability"""
-        if user.employment_tenure_years >= 5:
-            return 'very_stable'
-        elif user.employment_tenure_years >= 3:
-            return 'stable'
-        elif user.employment_tenure_years >= 1:
-            return 'moderate'
-        else:
-            return 'unstable'
+        for threshold, category in STABILITY_CATEGORIES:
+            if user.employment_tenure_years >= threshold:
+                return category
+        return 'unstable'
     
     def _assess_risk_profile(self, user):
         """Assess overall risk profile"""
@@ -178,14 +249,7 @@ class GeminiService:
         # DTI contribution
         if user.existing_emi and user.monthly_income:
             dti = user.existing_emi / user.monthly_income
-            if dti <= 0.3:
-                score += 5
-            elif dti <= 0.5:
-                score += 4
-            elif dti <= 0.7:
-                score += 3
-            else:
-                score += 2
+            score += next((points for bound, points in DTI_RISK_POINTS if dti <= bound), 2)
         
         # Categorize risk
         if score >= 18:
@@ -201,27 +265,19 @@ class GeminiService:
         """Assess loan eligibility across different types"""
         eligibility = {}
         
-        for loan_type, data in self.LOAN_DATA.items():
+        for loan_type in self.LOAN_DATA:
             score = 0
             
             # Credit score check
-            min_credit_requirements = {
-                'personal': 600, 'home': 620, 'auto': 600,
-                'business': 640, 'education': 550, 'medical': 0
-            }
-            if user.credit_score >= min_credit_requirements[loan_type]:
+            if user.credit_score >= MIN_CREDIT_REQUIREMENTS[loan_type]:
                 score += 3
             
             # Income check
-            min_income_requirements = {
-                'personal': 12000, 'home': 25000, 'auto': 18000,
-                'business': 35000, 'education': 0, 'medical': 8000
-            }
-            if user.monthly_income >= min_income_requirements[loan_type]:
+            if user.monthly_income >= MIN_INCOME_REQUIREMENTS[loan_type]:
                 score += 2
             
             # Employment stability
-            if user.employment_tenure_years >= 1:
+            if user.employment_tenure_years >= MIN_ELIGIBLE_TENURE_YEARS:
                 score += 2
             
             # Categorize eligibility
@@ -236,12 +292,18 @@ class GeminiService:
         
         return eligibility
     
-    def _generate_personalized_suggestions(self, user, profile):
-        """Generate personalized loan suggestions"""
+    def _personalize_suggestions(self, user, ranked):
+        """Ranked (suggestion, bank) pairs from the profile table with the user's personalized_reason"""
+        return [
+            dict(suggestion, personalized_reason=self._get_personalized_reason(user, suggestion['loan_type'], bank))
+            for suggestion, bank in ranked
+        ]
+    
+    def _rank_suggestions(self, profile):
+        """Top (suggestion, bank) pairs for a profile, without the per-user personalized_reason"""
         suggestions = []
         
-        # Get user's risk profile and eligibility
-        risk_profile = profile['risk_profile']
+        # Get eligibility by loan type
         eligibility = profile['loan_eligibility']
         
         # Recommend loans based on eligibility and risk
@@ -262,15 +324,14 @@ class GeminiService:
                         'approval_time': bank['approval_time'],
                         'eligibility_score': eligibility_level,
                         'benefits': loan_data['benefits'],
-                        'requirements': loan_data['requirements'],
-                        'personalized_reason': self._get_personalized_reason(user, loan_type, bank)
+                        'requirements': loan_data['requirements']
                     }
-                    suggestions.append(suggestion)
+                    suggestions.append((suggestion, bank))
         
         # Sort by eligibility score and interest rate
-        suggestions.sort(key=lambda x: (
-            0 if x['eligibility_score'] == 'high' else 1,
-            x['interest_rate']
+        suggestions.sort(key=lambda pair: (
+            0 if pair[0]['eligibility_score'] == 'high' else 1,
+            pair[0]['interest_rate']
         ))
         
         return suggestions[:6]  # Return top 6 suggestions
@@ -289,21 +350,120 @@ class GeminiService:
         return reasons.get(loan_type, f"{bank['name']} offers competitive rates for your profile.")
     
     def _get_gemini_insights(self, user, profile):
-        """Get AI insights from Gemini"""
+        """
+        Get AI insights from Gemini
+        
+        The prompt holds only profile buckets and placeholders for the exact
+        figures, so the response is cached (insights_cache) per bucket
+        combination and personalised by filling the figures back in. Callers
+        that miss the cache while the same prompt is in flight wait for that
+        call instead of making their own (insights_flight), for at most the
+        client timeout.
+        """
         if not self.api_available:
             return self._get_fallback_insights(user, profile)
-            
+        
+        prompt = self._insights_prompt(user, profile)
+        key = insights_cache.fingerprint(prompt)
+        template = insights_cache.get(key)
+        if template is None:
+            try:
+                template = insights_flight.do(key, lambda: self._fetch_insights(key, prompt),
+                                              timeout=self.client.timeout)
+            except (GeminiUnavailable, TimeoutError):
+                return self._get_fallback_insights(user, profile)
+        
+        return self._render_insights(template, user)
+    
+    def _fetch_insights(self, key, prompt):
+        # A flight that finished between our cache miss and join already cached it
+        template = insights_cache.peek(key)
+        if template is not None:
+            return template
+        template = self.client.generate(prompt)
+        insights_cache.put(key, template)
+        return template
+    
+    def stream_insights(self, user):
+        """
+        Yield the Gemini insights text as it arrives
+        
+        Cached and fallback insights come in one piece; fresh ones chunk by
+        chunk as the model streams them, and are cached once complete. If the
+        stream fails before any text, the fallback insights are sent instead.
+        While the same prompt is already in flight, the text arrives in one
+        piece when that call completes (or the fallback insights after the
+        client timeout), without a second upstream call.
+        """
+        profile = self._analyze_user_profile(user)
+        if not self.api_available:
+            yield self._get_fallback_insights(user, profile)
+            return
+        
+        prompt = self._insights_prompt(user, profile)
+        key = insights_cache.fingerprint(prompt)
+        template = insights_cache.get(key)
+        if template is not None:
+            yield self._render_insights(template, user)
+            return
+        
+        flight, leader = insights_flight.join(key)
+        if not leader:
+            try:
+                template = flight.wait(self.client.timeout)
+            except (GeminiUnavailable, TimeoutError):
+                template = None
+            yield self._render_insights(template, user) if template else self._get_fallback_insights(user, profile)
+            return
+        
+        # A flight that finished between our cache miss and join already cached it
+        template = insights_cache.peek(key)
+        if template is not None:
+            insights_flight.finish(key, flight, template)
+            yield self._render_insights(template, user)
+            return
+        
+        received = []
+        pending = ''
+        error = GeminiUnavailable('Insights stream ended early')
         try:
-            prompt = f"""
+            for chunk in self.client.stream(prompt):
+                received.append(chunk)
+                pending += chunk
+                # Hold back a trailing placeholder that may continue in the next chunk
+                cut = pending.rfind('[')
+                if cut == -1 or ']' in pending[cut:]:
+                    cut = len(pending)
+                if cut:
+                    yield self._render_insights(pending[:cut], user)
+                    pending = pending[cut:]
+            template = ''.join(received)
+            insights_cache.put(key, template)
+            error = None
+        except GeminiUnavailable as e:
+            error = e
+            if not received:
+                yield self._get_fallback_insights(user, profile)
+                return
+        finally:
+            # Also runs if the reader disconnects mid-stream, so followers never hang
+            insights_flight.finish(key, flight, template, error)
+        
+        if pending:
+            yield self._render_insights(pending, user)
+    
+    def _insights_prompt(self, user, profile):
+        """Insights prompt with placeholders instead of the applicant's exact figures"""
+        return f"""
             As a financial advisor, analyze this loan applicant's profile and provide insights:
             
             Profile:
-            - Monthly Income: ₹{user.monthly_income:,.0f}
-            - Credit Score: {user.credit_score}
+            - Monthly Income: [MONTHLY_INCOME] ({profile['income_category'].replace('_', ' ')} income band)
+            - Credit Score: [CREDIT_SCORE] ({profile['credit_category'].replace('_', ' ')})
             - Employment Type: {user.employment_type}
-            - Employment Tenure: {user.employment_tenure_years} years
+            - Employment Tenure: [EMPLOYMENT_TENURE] years ({profile['employment_stability'].replace('_', ' ')})
             - Risk Profile: {profile['risk_profile']}
-            - Existing EMI: ₹{user.existing_emi:,.0f}
+            - Existing EMI: [EXISTING_EMI] ({self._categorize_existing_emi(user).replace('_', ' ')} of income)
             
             Provide:
             1. Overall financial health assessment (2-3 sentences)
@@ -311,14 +471,38 @@ class GeminiService:
             3. Key areas to improve for better loan terms
             4. Risk factors to consider
             
-            Keep response concise and actionable.
+            Keep response concise and actionable. Refer to the applicant's figures only with the
+            bracketed placeholders above ([MONTHLY_INCOME], [CREDIT_SCORE], [EMPLOYMENT_TENURE],
+            [EXISTING_EMI]), written exactly as shown.
             """
-            
-            response = self.model.generate_content(prompt)
-            return response.text
-            
-        except Exception as e:
-            return self._get_fallback_insights(user, profile)
+    
+    def _categorize_existing_emi(self, user):
+        """Existing EMI as a share of monthly income, in the bands used by _assess_risk_profile"""
+        if not user.existing_emi:
+            return 'none'
+        if not user.monthly_income:
+            return 'over_70_percent'
+        ratio = user.existing_emi / user.monthly_income
+        if ratio <= 0.3:
+            return 'up_to_30_percent'
+        elif ratio <= 0.5:
+            return '30_to_50_percent'
+        elif ratio <= 0.7:
+            return '50_to_70_percent'
+        else:
+            return 'over_70_percent'
+    
+    def _render_insights(self, template, user):
+        """Fill an insights template's placeholders with the applicant's figures"""
+        figures = {
+            '[MONTHLY_INCOME]': f"₹{user.monthly_income:,.0f}",
+            '[CREDIT_SCORE]': str(user.credit_score),
+            '[EMPLOYMENT_TENURE]': f"{user.employment_tenure_years:g}",
+            '[EXISTING_EMI]': f"₹{user.existing_emi or 0:,.0f}"
+        }
+        for placeholder, value in figures.items():
+            template = template.replace(placeholder, value)
+        return template
     
     def _get_fallback_insights(self, user, profile):
         """Get fallback insights when AI is unavailable"""
@@ -397,11 +581,11 @@ class GeminiService:
             Keep responses concise and actionable.
             """
             
-            response = self.model.generate_content(context)
+            response = self.client.generate(context)
             
             return {
                 'status': 'success',
-                'response': response.text,
+                'response': response,
                 'session_id': session_id,
                 'timestamp': datetime.now().isoformat()
             }
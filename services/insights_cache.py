@@ -0,0 +1,88 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+class InsightsCache:
+    """
+    TTL + LRU cache of Gemini insight templates keyed on a prompt fingerprint
+
+    The insights prompt carries only profile buckets plus placeholders for the
+    applicant's exact figures, so every applicant in the same buckets sends
+    the same prompt. Its whitespace-normalized SHA-256 is the key, and the
+    cached value is the model's response with the placeholders still in it;
+    GeminiService fills in each applicant's figures on the way out.
+    """
+
+    def __init__(self, max_size=512, ttl_seconds=3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, template)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def fingerprint(prompt):
+        """Hash of the prompt with runs of whitespace collapsed"""
+        normalized = re.sub(r'\s+', ' ', prompt).strip()
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, template = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return template
+
+    def peek(self, key):
+        """Like get, but leaves the hit/miss counters and LRU order alone (for rechecks)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[1]
+
+    def put(self, key, template):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, template)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit-rate and size metrics for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+# Shared by every GeminiService in this process
+insights_cache = InsightsCache()
@@ -1,9 +1,127 @@
 import math
 from datetime import date
+from functools import lru_cache
+from itertools import accumulate, repeat
+
+import numpy as np
+
+# Rates and tenures come from a small set, so the same (rate, months) pairs
+# recur across requests; power factors are cached process-wide.
+ANNUITY_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=ANNUITY_CACHE_SIZE)
+def _power_factor(monthly_rate, months):
+    """(1 + r) ** n, memoized on (monthly rate, months); lru_cache is thread-safe"""
+    return (1 + monthly_rate) ** months
+
+
+def round_array(values, digits=2):
+    """
+    Round an array exactly like the builtin round(value, digits)
+
+    np.round scales by 10**digits before rounding, which occasionally lands on
+    the other side of a ...5 boundary; falling back to round() for those few
+    elements keeps batch results identical to the scalar methods.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, digits)
+    with np.errstate(invalid='ignore'):
+        scaled = values * 10 ** digits
+        ambiguous = np.isfinite(values) & (np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6)
+    if ambiguous.any():
+        rounded[ambiguous] = [round(float(v), digits) for v in values[ambiguous]]
+    return rounded
+
+def _scalar_or_array(values):
+    """Return a Python float for 0-d results, the array otherwise"""
+    return float(values) if np.ndim(values) == 0 else values
+
+class AmortizationSchedule:
+    """
+    Array-backed amortization schedule
+
+    Stores each column (month, payment, principal, interest, balance) as a
+    contiguous NumPy array instead of one dict per month. Supports len(),
+    indexing, slicing, iteration and totals; to_list() converts to the legacy
+    list-of-dicts format returned by generate_amortization_schedule.
+    """
+
+    COLUMNS = ('month', 'payment', 'principal', 'interest', 'balance')
+
+    __slots__ = COLUMNS
+
+    def __init__(self, month, payment, principal, interest, balance):
+        self.month = np.asarray(month, dtype=np.int32)
+        self.payment = np.asarray(payment, dtype=float)
+        self.principal = np.asarray(principal, dtype=float)
+        self.interest = np.asarray(interest, dtype=float)
+        self.balance = np.asarray(balance, dtype=float)
+
+    @classmethod
+    def empty(cls):
+        return cls(*([] for _ in cls.COLUMNS))
+
+    def __len__(self):
+        return len(self.month)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return AmortizationSchedule(*(getattr(self, column)[index] for column in self.COLUMNS))
+        return self._row(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._row(index)
+
+    def _row(self, index):
+        return {
+            'month': int(self.month[index]),
+            'payment': float(self.payment[index]),
+            'principal': float(self.principal[index]),
+            'interest': float(self.interest[index]),
+            'balance': float(self.balance[index])
+        }
+
+    @property
+    def nbytes(self):
+        """Memory held by the column arrays"""
+        return sum(getattr(self, column).nbytes for column in self.COLUMNS)
+
+    def totals(self):
+        """Aggregate payment, principal and interest over the schedule"""
+        return {
+            'months': len(self),
+            'total_payment': round(float(self.payment.sum()), 2),
+            'total_principal': round(float(self.principal.sum()), 2),
+            'total_interest': round(float(self.interest.sum()), 2)
+        }
+
+    def to_list(self):
+        """Convert to the legacy list-of-dicts schedule"""
+        return list(self)
 
 class LoanCalculator:
     """Loan calculation service with all financial formulas"""
     
+    @staticmethod
+    def annuity_cache_info():
+        """Hit/miss counters and size of the shared power-factor cache"""
+        info = _power_factor.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0,
+            'size': info.currsize,
+            'max_size': info.maxsize
+        }
+    
+    @staticmethod
+    def clear_annuity_cache():
+        """Drop all cached power factors and reset the counters"""
+        _power_factor.cache_clear()
+    
     def calculate_emi(self, principal, annual_rate_percent, tenure_years):
         """
         Calculate EMI using the standard formula
@@ -30,7 +148,7 @@ class LoanCalculator:
         months = tenure_years * 12
         
         # Calculate EMI
-        power_factor = (1 + monthly_rate) ** months
+        power_factor = _power_factor(monthly_rate, months)
         emi = principal * monthly_rate * power_factor / (power_factor - 1)
         
         return round(emi, 2)
@@ -51,6 +169,146 @@ class LoanCalculator:
         
         return round(emi * months, 2)
     
+    def calculate_emi_batch(self, principal, annual_rate_percent, tenure_years):
+        """
+        Vectorized EMI for many loans at once
+
+        Accepts scalars, sequences or NumPy arrays that broadcast against each
+        other and returns an array of EMIs identical to calling calculate_emi
+        on each element.
+        """
+        principal, annual_rate_percent, tenure_years = np.broadcast_arrays(
+            np.asarray(principal, dtype=float),
+            np.asarray(annual_rate_percent, dtype=float),
+            np.asarray(tenure_years, dtype=float)
+        )
+        months = tenure_years * 12
+        emi = np.zeros(principal.shape)
+
+        # Zero interest case
+        zero_rate = (principal > 0) & (annual_rate_percent <= 0)
+        emi[zero_rate] = principal[zero_rate] / months[zero_rate]
+
+        # Standard formula for the remaining positive-rate loans
+        standard = (principal > 0) & (annual_rate_percent > 0)
+        monthly_rate = annual_rate_percent[standard] / 100 / 12
+        power_factor = (1 + monthly_rate) ** months[standard]
+        emi[standard] = principal[standard] * monthly_rate * power_factor / (power_factor - 1)
+
+        return round_array(emi)
+
+    def annuity_factor_batch(self, annual_rate_percent, tenure_years):
+        """
+        Unrounded EMI per rupee of principal (EMI = principal * factor)
+
+        Broadcasts like calculate_emi_batch; useful when many principals share
+        a few rate/tenure combinations.
+        """
+        annual_rate_percent, tenure_years = np.broadcast_arrays(
+            np.asarray(annual_rate_percent, dtype=float),
+            np.asarray(tenure_years, dtype=float)
+        )
+        months = tenure_years * 12
+        monthly_rate = np.where(annual_rate_percent > 0, annual_rate_percent / 100 / 12, 0)
+        safe_rate = np.where(monthly_rate > 0, monthly_rate, 1.0)
+        power_factor = (1 + safe_rate) ** months
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(monthly_rate > 0, safe_rate * power_factor / (power_factor - 1), 1 / months)
+
+    def calculate_total_interest_batch(self, principal, annual_rate_percent, tenure_years):
+        """Vectorized counterpart of calculate_total_interest"""
+        emi = self.calculate_emi_batch(principal, annual_rate_percent, tenure_years)
+        months = np.asarray(tenure_years, dtype=float) * 12
+        total_interest = emi * months - np.asarray(principal, dtype=float)
+
+        return round_array(np.maximum(0, total_interest))
+
+    def calculate_total_payable_batch(self, principal, annual_rate_percent, tenure_years):
+        """Vectorized counterpart of calculate_total_payable"""
+        emi = self.calculate_emi_batch(principal, annual_rate_percent, tenure_years)
+        months = np.asarray(tenure_years, dtype=float) * 12
+
+        return round_array(emi * months)
+
+    def solve_tenure_for_emi(self, principal, annual_rate_percent, target_emi):
+        """
+        Shortest whole tenure (years) whose EMI does not exceed target_emi
+        
+        Works on scalars or broadcastable arrays. Uses the closed form
+        n = -ln(1 - P*r/EMI) / ln(1 + r), then checks the rounded EMI at the
+        candidate tenure so the answer is exact for calculate_emi. Returns NaN
+        where no tenure can bring the EMI under the target (EMI <= P*r).
+        """
+        principal, annual_rate_percent, target_emi = np.broadcast_arrays(
+            np.asarray(principal, dtype=float),
+            np.asarray(annual_rate_percent, dtype=float),
+            np.asarray(target_emi, dtype=float)
+        )
+        monthly_rate = np.where(annual_rate_percent > 0, annual_rate_percent / 100 / 12, 0)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coverage = principal * monthly_rate / target_emi
+            months = np.where(
+                monthly_rate > 0,
+                -np.log1p(-np.minimum(coverage, 1)) / np.log1p(monthly_rate),
+                principal / target_emi
+            )
+        feasible = (target_emi > 0) & (coverage < 1) & (principal > 0)
+        years = np.where(feasible, np.maximum(1, np.ceil(months / 12 - 1e-9)), 1)
+        
+        # EMIs are rounded to the paisa, so the candidate can be one year off
+        too_high = feasible & (self.calculate_emi_batch(principal, annual_rate_percent, years) > target_emi)
+        years = np.where(too_high, years + 1, years)
+        fits_shorter = feasible & (years > 1) & (
+            self.calculate_emi_batch(principal, annual_rate_percent, np.maximum(1, years - 1)) <= target_emi)
+        years = np.where(fits_shorter, years - 1, years)
+        
+        years = np.where(principal <= 0, 1, years)
+        return _scalar_or_array(np.where(feasible | (principal <= 0), years, np.nan))
+    
+    def solve_rate_for_emi(self, principal, tenure_years, target_emi, tolerance=1e-10, max_iterations=100):
+        """
+        Annual interest rate (%) implied by an EMI for a given principal and tenure
+        
+        Works on scalars or broadcastable arrays. Runs Newton's method on the
+        monthly rate safeguarded by bisection inside the bracket [0, EMI/P], so it
+        always converges; the bracket halves at least every other step. Returns
+        NaN where the target is below the zero-interest EMI (P / months).
+        """
+        principal, tenure_years, target_emi = np.broadcast_arrays(
+            np.asarray(principal, dtype=float),
+            np.asarray(tenure_years, dtype=float),
+            np.asarray(target_emi, dtype=float)
+        )
+        months = tenure_years * 12
+        feasible = (principal > 0) & (months > 0) & (target_emi * months >= principal)
+        principal = np.where(feasible, principal, 1.0)
+        months = np.where(feasible, months, 1.0)
+        target_emi = np.where(feasible, target_emi, 1.0)
+        
+        low = np.zeros(principal.shape)
+        high = target_emi / principal
+        rate = (low + high) / 2
+        
+        for _ in range(max_iterations):
+            discount = (1 + rate) ** -months
+            annuity = np.where(rate > 1e-12, principal * rate / (1 - discount), principal / months)
+            error = annuity - target_emi
+            
+            low = np.where(error < 0, rate, low)
+            high = np.where(error > 0, rate, high)
+            if np.all(high - low <= tolerance):
+                break
+            
+            derivative = principal * ((1 - discount) - rate * months * discount / (1 + rate)) / (1 - discount) ** 2
+            with np.errstate(divide='ignore', invalid='ignore'):
+                newton = rate - error / derivative
+            inside = np.isfinite(newton) & (newton > low) & (newton < high)
+            rate = np.where(error == 0, rate, np.where(inside, newton, (low + high) / 2))
+        
+        return _scalar_or_array(np.where(feasible, np.round(rate * 12 * 100, 6), np.nan))
+    
     def calculate_ltv(self, loan_amount, down_payment, property_value):
         """
         Calculate Loan-to-Value ratio
@@ -77,6 +335,34 @@ class LoanCalculator:
         
         return round(min(1.0, max(0.0, dti)), 3)
     
+    def calculate_ltv_batch(self, loan_amount, down_payment, property_value):
+        """Vectorized counterpart of calculate_ltv"""
+        loan_amount, down_payment, property_value = np.broadcast_arrays(
+            np.asarray(loan_amount, dtype=float),
+            np.asarray(down_payment, dtype=float),
+            np.asarray(property_value, dtype=float)
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ltv = np.maximum(0, loan_amount - down_payment) / property_value
+        ltv = round_array(np.clip(ltv, 0.0, 1.0), 3)
+        
+        return np.where(property_value > 0, ltv, 0.0)
+    
+    def calculate_dti_batch(self, total_monthly_income, existing_emi, other_obligations, new_emi):
+        """Vectorized counterpart of calculate_dti"""
+        total_monthly_income, existing_emi, other_obligations, new_emi = np.broadcast_arrays(
+            np.asarray(total_monthly_income, dtype=float),
+            np.asarray(existing_emi, dtype=float),
+            np.asarray(other_obligations, dtype=float),
+            np.asarray(new_emi, dtype=float)
+        )
+        total_debt = existing_emi + other_obligations + new_emi
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dti = round_array(np.clip(total_debt / total_monthly_income, 0.0, 1.0), 3)
+        
+        # Max DTI if no income
+        return np.where(total_monthly_income > 0, dti, 1.0)
+    
     def calculate_dscr(self, net_operating_income, annual_debt_service):
         """
         Calculate Debt Service Coverage Ratio (for business loans)
@@ -100,6 +386,20 @@ class LoanCalculator:
         
         return age
     
+    def calculate_age_at_maturity_batch(self, birth_date, tenure_years):
+        """Vectorized counterpart of calculate_age_at_maturity (birth dates as datetime64 or dates)"""
+        today = date.today()
+        birth_date = np.asarray(birth_date, dtype='datetime64[D]')
+        birth_year = birth_date.astype('datetime64[Y]').astype(int) + 1970
+        birth_month_start = birth_date.astype('datetime64[M]')
+        birth_month = (birth_month_start - birth_date.astype('datetime64[Y]')).astype(int) + 1
+        birth_day = (birth_date - birth_month_start).astype(int) + 1
+        
+        age = today.year + np.asarray(tenure_years, dtype=int) - birth_year
+        before_birthday = (today.month < birth_month) | ((today.month == birth_month) & (today.day < birth_day))
+        
+        return age - before_birthday
+    
     def calculate_effective_collateral_value(self, reported_value, haircut_percent):
         """
         Calculate effective collateral value after applying haircut
@@ -164,6 +464,114 @@ class LoanCalculator:
         
         return schedule
     
+    def generate_amortization_table(self, principal, annual_rate_percent, tenure_years):
+        """
+        Generate the monthly amortization schedule as an AmortizationSchedule
+
+        Columnar alternative to generate_amortization_schedule. The running
+        balance is carried month by month with the same float operations as
+        the loop, and the other columns are derived from it in one vectorized
+        pass, so to_list() equals generate_amortization_schedule exactly.
+        """
+        if principal <= 0 or annual_rate_percent < 0 or tenure_years <= 0:
+            return AmortizationSchedule.empty()
+        
+        monthly_rate = annual_rate_percent / 100 / 12 if annual_rate_percent > 0 else 0
+        months = tenure_years * 12
+        
+        if monthly_rate == 0:
+            emi = principal / months
+            step = lambda balance, _: balance - emi
+        else:
+            emi = self.calculate_emi(principal, annual_rate_percent, tenure_years)
+            step = lambda balance, _: balance - (emi - balance * monthly_rate)
+        
+        # Balance at the start of each month, accumulated like the loop (closed form drifts by a paisa)
+        opening_balance = np.fromiter(accumulate(repeat(None, months - 1), step, initial=principal),
+                                      dtype=float, count=months)
+        interest = opening_balance * monthly_rate
+        principal_payment = emi - interest
+        
+        return AmortizationSchedule(
+            np.arange(1, months + 1),
+            np.full(months, round(emi, 2)),
+            round_array(principal_payment),
+            round_array(interest),
+            round_array(np.maximum(0, opening_balance - principal_payment))
+        )
+    
+    def schedule_row(self, principal, annual_rate_percent, tenure_years, month):
+        """
+        Get a single amortization row without generating the full schedule
+        
+        Computed in closed form, so its figures agree with the row that
+        generate_amortization_schedule builds month by month only to within
+        0.01. Returns None if the month is outside the loan tenure.
+        """
+        if principal <= 0 or annual_rate_percent < 0 or tenure_years <= 0:
+            return None
+        
+        if month < 1 or month > tenure_years * 12:
+            return None
+        
+        return self._schedule_rows(principal, annual_rate_percent, tenure_years, [month])[0]
+    
+    def generate_amortization_page(self, principal, annual_rate_percent, tenure_years,
+                                   offset, limit):
+        """
+        Get `limit` consecutive amortization rows starting after month `offset`
+        
+        Only the requested months are computed; returns an AmortizationSchedule.
+        """
+        if principal <= 0 or annual_rate_percent < 0 or tenure_years <= 0:
+            return AmortizationSchedule.empty()
+        
+        first_month = max(0, offset) + 1
+        last_month = min(max(0, offset) + limit, tenure_years * 12)
+        if last_month < first_month:
+            return AmortizationSchedule.empty()
+        
+        return self._schedule_rows(principal, annual_rate_percent, tenure_years,
+                                   np.arange(first_month, last_month + 1))
+    
+    def balance_after(self, principal, annual_rate_percent, tenure_years, month):
+        """Outstanding balance after the given number of EMIs, in closed form"""
+        if month <= 0:
+            return round(max(0, principal), 2)
+        
+        row = self.schedule_row(principal, annual_rate_percent, tenure_years,
+                                min(month, tenure_years * 12))
+        return row['balance'] if row else 0.0
+    
+    def _schedule_rows(self, principal, annual_rate_percent, tenure_years, month):
+        """Compute amortization rows for the given (1-based) months in closed form"""
+        monthly_rate = annual_rate_percent / 100 / 12 if annual_rate_percent > 0 else 0
+        months = tenure_years * 12
+        month = np.asarray(month)
+        
+        if monthly_rate == 0:
+            # Zero interest case
+            monthly_payment = principal / months
+            payment = np.full(month.shape, monthly_payment)
+            interest = np.zeros(month.shape)
+            balance = principal - monthly_payment * month
+        else:
+            emi = self.calculate_emi(principal, annual_rate_percent, tenure_years)
+            growth = 1 + monthly_rate
+            opening_factor = growth ** (month - 1)
+            opening_balance = principal * opening_factor - emi * (opening_factor - 1) / monthly_rate
+            payment = np.full(month.shape, emi)
+            interest = opening_balance * monthly_rate
+            balance = opening_balance - (emi - interest)
+        
+        return AmortizationSchedule(
+            month,
+            round_array(payment),
+            round_array(payment - interest),
+            round_array(interest),
+            round_array(np.maximum(0, balance))
+        )
+    
     def calculate_loan_eligibility(self, monthly_income, monthly_obligations, 
                                  annual_rate_percent, tenure_years, max_dti=0.50):
         """
@@ -184,11 +592,43 @@ class LoanCalculator:
             return max_monthly_payment * months
         
         # Calculate principal from EMI using reverse formula
-        power_factor = (1 + monthly_rate) ** months
+        power_factor = _power_factor(monthly_rate, months)
         max_principal = max_monthly_payment * (power_factor - 1) / (monthly_rate * power_factor)
         
         return round(max(0, max_principal), 2)
     
+    def eligibility_grid(self, monthly_income, monthly_obligations, annual_rates_percent,
+                         tenures_years, max_dti=0.50):
+        """
+        Maximum eligible loan amount over a rate x tenure matrix
+        
+        Vectorized counterpart of calculate_loan_eligibility: returns an array of
+        shape (len(annual_rates_percent), len(tenures_years)) where entry [i, j]
+        equals calculate_loan_eligibility(..., annual_rates_percent[i], tenures_years[j], max_dti).
+        """
+        annual_rates_percent = np.asarray(annual_rates_percent, dtype=float).reshape(-1, 1)
+        months = np.asarray(tenures_years, dtype=float).reshape(1, -1) * 12
+        shape = (annual_rates_percent.shape[0], months.shape[1])
+        
+        if monthly_income <= 0:
+            return np.zeros(shape)
+        
+        max_monthly_payment = (monthly_income * max_dti) - monthly_obligations
+        
+        if max_monthly_payment <= 0:
+            return np.zeros(shape)
+        
+        monthly_rate = np.where(annual_rates_percent > 0, annual_rates_percent / 100 / 12, 0)
+        zero_rate = np.broadcast_to(monthly_rate == 0, shape)
+        
+        # Substitute a dummy rate for zero-rate rows so the reverse formula stays finite
+        safe_rate = np.where(monthly_rate == 0, 1.0, monthly_rate)
+        power_factor = (1 + safe_rate) ** months
+        max_principal = round_array(np.maximum(
+            0, max_monthly_payment * (power_factor - 1) / (safe_rate * power_factor)))
+        
+        return np.where(zero_rate, max_monthly_payment * months, max_principal)
+    
     def calculate_interest_savings(self, principal, tenure_years, rate1, rate2):
         """
         Calculate interest savings between two interest rates
@@ -215,11 +655,12 @@ class LoanCalculator:
         if prepayment_month >= months:
             return 0.0
         
-        remaining_balance = principal
-        for month in range(1, prepayment_month + 1):
-            interest = remaining_balance * monthly_rate
-            principal_payment = original_emi - interest
-            remaining_balance -= principal_payment
+        if monthly_rate > 0:
+            growth_factor = _power_factor(monthly_rate, prepayment_month)
+            remaining_balance = (principal * growth_factor -
+                                 original_emi * (growth_factor - 1) / monthly_rate)
+        else:
+            remaining_balance = principal - original_emi * prepayment_month
         
         # Apply prepayment
         remaining_balance -= prepayment_amount
@@ -231,7 +672,7 @@ class LoanCalculator:
         else:
             # Recalculate EMI for remaining balance and tenure
             remaining_months = months - prepayment_month
-            power_factor = (1 + monthly_rate) ** remaining_months
+            power_factor = _power_factor(monthly_rate, remaining_months)
             new_emi = remaining_balance * monthly_rate * power_factor / (power_factor - 1)
             new_months = remaining_months
         
@@ -239,3 +680,139 @@ class LoanCalculator:
         savings = original_total - new_total
         
         return round(max(0, savings), 2)
+    
+    def evaluate_prepayment_scenarios(self, principal, annual_rate_percent, tenure_years, scenarios):
+        """
+        Evaluate many multi-event prepayment plans for one loan in a single pass
+        
+        Args:
+            principal: Loan amount
+            annual_rate_percent: Annual interest rate in percentage
+            tenure_years: Original loan tenure in years
+            scenarios: List of scenarios, each a list of prepayment events. An event
+                is a dict with 'amount', 'month' (paid right after that month's EMI)
+                and optional 'mode': 'reduce_tenure' (default, keep the EMI) or
+                'reduce_emi' (keep the end date, re-amortize the EMI)
+        
+        Returns:
+            List of dicts (one per scenario) with final EMI, months to close,
+            total payable, total interest and savings against no prepayment
+        
+        Every segment between two events is evaluated in closed form, and all
+        scenarios advance together as NumPy arrays, one event slot at a time.
+        """
+        if principal <= 0 or annual_rate_percent < 0 or tenure_years <= 0 or not scenarios:
+            return []
+        
+        monthly_rate = annual_rate_percent / 100 / 12 if annual_rate_percent > 0 else 0
+        months = tenure_years * 12
+        original_emi = self.calculate_emi(principal, annual_rate_percent, tenure_years)
+        
+        # Pad events into (scenario x event slot) arrays, ordered by month
+        slots = max(len(events) for events in scenarios)
+        event_month = np.full((len(scenarios), slots), np.inf)
+        event_amount = np.zeros((len(scenarios), slots))
+        event_reduce_emi = np.zeros((len(scenarios), slots), dtype=bool)
+        for row, events in enumerate(scenarios):
+            for slot, event in enumerate(sorted(events, key=lambda e: e['month'])):
+                event_month[row, slot] = max(0, event['month'])
+                event_amount[row, slot] = max(0, event['amount'])
+                event_reduce_emi[row, slot] = event.get('mode', 'reduce_tenure') == 'reduce_emi'
+        
+        balance = np.full(len(scenarios), float(principal))
+        emi = np.full(len(scenarios), original_emi)
+        month = np.zeros(len(scenarios))
+        term_end = np.full(len(scenarios), float(months))
+        total_paid = np.zeros(len(scenarios))
+        close_month = np.zeros(len(scenarios))
+        closed = np.zeros(len(scenarios), dtype=bool)
+        
+        for slot in range(slots):
+            active = ~closed & np.isfinite(event_month[:, slot])
+            if not active.any():
+                break
+            
+            # Loans that are repaid before this event's month close out here
+            months_left = self._months_to_repay(balance, emi, monthly_rate)
+            elapsed = np.where(active, event_month[:, slot] - month, 0)
+            closes = active & (elapsed >= months_left - 1e-9)
+            if closes.any():
+                paid, n = self._closing_payments(balance[closes], emi[closes], monthly_rate)
+                total_paid[closes] += paid
+                close_month[closes] = month[closes] + n
+                balance[closes] = 0
+                closed |= closes
+            
+            # Advance the rest to the event month and apply the prepayment
+            go = active & ~closes
+            balance[go] = self._segment_balance(balance[go], emi[go], monthly_rate, elapsed[go])
+            total_paid[go] += emi[go] * elapsed[go]
+            month[go] = event_month[go, slot]
+            
+            prepaid = np.minimum(event_amount[go, slot], balance[go])
+            balance[go] -= prepaid
+            total_paid[go] += prepaid
+            
+            paid_off = go & (balance < 0.005)
+            close_month[paid_off] = month[paid_off]
+            balance[paid_off] = 0
+            closed |= paid_off
+            
+            still_open = go & ~paid_off
+            reduce_emi = still_open & event_reduce_emi[:, slot] & (term_end > month)
+            emi[reduce_emi] = self._annuity_payment(balance[reduce_emi], monthly_rate,
+                                                    term_end[reduce_emi] - month[reduce_emi])
+            reduce_tenure = still_open & ~reduce_emi
+            term_end[reduce_tenure] = month[reduce_tenure] + np.ceil(
+                self._months_to_repay(balance[reduce_tenure], emi[reduce_tenure], monthly_rate) - 1e-9)
+        
+        # Run every remaining loan to payoff with its current EMI
+        remaining = ~closed
+        paid, n = self._closing_payments(balance[remaining], emi[remaining], monthly_rate)
+        total_paid[remaining] += paid
+        close_month[remaining] = month[remaining] + n
+        
+        baseline_paid, baseline_months = self._closing_payments(
+            np.array([float(principal)]), np.array([original_emi]), monthly_rate)
+        
+        results = []
+        for row in range(len(scenarios)):
+            results.append({
+                'final_emi': round(float(emi[row]), 2) if close_month[row] > month[row] else 0.0,
+                'months': int(close_month[row]),
+                'total_payable': round(float(total_paid[row]), 2),
+                'total_interest': round(max(0.0, float(total_paid[row]) - principal), 2),
+                'interest_saved': round(float(baseline_paid[0] - total_paid[row]), 2),
+                'months_saved': int(baseline_months[0] - close_month[row])
+            })
+        
+        return results
+    
+    def _annuity_payment(self, balance, monthly_rate, months):
+        """EMI that repays balance over months (arrays)"""
+        if monthly_rate == 0:
+            return balance / months
+        power_factor = (1 + monthly_rate) ** months
+        return balance * monthly_rate * power_factor / (power_factor - 1)
+    
+    def _segment_balance(self, balance, emi, monthly_rate, months):
+        """Balance left after paying emi for months (arrays, closed form)"""
+        if monthly_rate == 0:
+            return balance - emi * months
+        growth_factor = (1 + monthly_rate) ** months
+        return balance * growth_factor - emi * (growth_factor - 1) / monthly_rate
+    
+    def _months_to_repay(self, balance, emi, monthly_rate):
+        """Fractional number of EMIs needed to clear balance (arrays)"""
+        if monthly_rate == 0:
+            return balance / emi
+        coverage = np.clip(balance * monthly_rate / emi, 0, 1 - 1e-12)
+        return -np.log1p(-coverage) / np.log1p(monthly_rate)
+    
+    def _closing_payments(self, balance, emi, monthly_rate):
+        """Total paid and EMIs needed to close balance, with a smaller final EMI"""
+        full_months = np.floor(self._months_to_repay(balance, emi, monthly_rate) + 1e-9)
+        residual = np.maximum(0, self._segment_balance(balance, emi, monthly_rate, full_months))
+        final_month = residual >= 0.005
+        paid = emi * full_months + np.where(final_month, residual * (1 + monthly_rate), 0)
+        return paid, full_months + final_month
@@ -0,0 +1,170 @@
+import copy
+import json
+import threading
+from datetime import datetime
+from types import MappingProxyType
+
+from .decision_engine import DecisionEngine
+
+# Keys every loan-type policy must define
+REQUIRED_POLICY_KEYS = ('min_income', 'max_dti', 'max_ltv', 'min_credit',
+                        'min_tenure_years', 'min_age', 'max_age')
+
+
+def _freeze(value):
+    """Recursively wrap dicts in read-only mapping proxies"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+
+def _thaw(value):
+    """Recursively copy read-only mappings back into plain dicts"""
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    return copy.deepcopy(value)
+
+
+class PolicySnapshot:
+    """Immutable, versioned set of decision policies, tolerances and scoring weights"""
+
+    __slots__ = ('version', 'policies', 'tolerances', 'scoring_weights', 'source', 'loaded_at')
+
+    def __init__(self, version, policies, tolerances, scoring_weights, source='builtin'):
+        self._validate(policies)
+        object.__setattr__(self, 'version', str(version))
+        object.__setattr__(self, 'policies', _freeze(policies))
+        object.__setattr__(self, 'tolerances', _freeze(tolerances))
+        object.__setattr__(self, 'scoring_weights', _freeze(scoring_weights))
+        object.__setattr__(self, 'source', source)
+        object.__setattr__(self, 'loaded_at', datetime.now())
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PolicySnapshot is immutable')
+
+    def __repr__(self):
+        return f'<PolicySnapshot {self.version} from {self.source}>'
+
+    @staticmethod
+    def _validate(policies):
+        if 'personal' not in policies:
+            raise ValueError("Policies must define 'personal' (the fallback loan type)")
+        for loan_type, policy in policies.items():
+            missing = [key for key in REQUIRED_POLICY_KEYS if key not in policy]
+            if missing:
+                raise ValueError(f"Policy '{loan_type}' is missing: {', '.join(missing)}")
+
+    @classmethod
+    def builtin(cls):
+        """Snapshot of the defaults hardcoded in DecisionEngine"""
+        engine = DecisionEngine()
+        return cls(
+            engine.policy_version,
+            engine.POLICIES,
+            {'dti': engine.DTI_TOLERANCE, 'ltv': engine.LTV_TOLERANCE, 'credit': engine.CREDIT_TOLERANCE},
+            engine.SCORING_WEIGHTS
+        )
+
+    @classmethod
+    def from_dict(cls, data, source='dict', base=None):
+        """
+        Build a snapshot from {'version', 'policies', 'tolerances', 'scoring_weights'}
+
+        Missing tolerances or scoring weights are taken from `base` (the
+        built-in snapshot by default).
+        """
+        if 'version' not in data or 'policies' not in data:
+            raise ValueError("Policy data must include 'version' and 'policies'")
+        base = base or cls.builtin()
+        tolerances = dict(base.tolerances)
+        tolerances.update(data.get('tolerances', {}))
+        scoring_weights = dict(base.scoring_weights)
+        scoring_weights.update(data.get('scoring_weights', {}))
+        return cls(data['version'], data['policies'], tolerances, scoring_weights, source)
+
+    def policies_dict(self):
+        """Mutable deep copy of the policies"""
+        return _thaw(self.policies)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'policies': self.policies_dict(),
+            'tolerances': _thaw(self.tolerances),
+            'scoring_weights': _thaw(self.scoring_weights)
+        }
+
+
+class PolicyRegistry:
+    """
+    Process-wide registry of the active policy snapshot and its compiled engine
+
+    Readers get the current (snapshot, engine) pair without locking; publishing
+    builds and compiles a new engine first and then swaps the pair in one
+    assignment (copy-on-write), so in-flight decisions keep the engine they
+    started with and no restart is needed.
+    """
+
+    HISTORY_SIZE = 20
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        snapshot = PolicySnapshot.builtin()
+        self._active = (snapshot, DecisionEngine(snapshot))
+        self._history = [snapshot]
+
+    def current(self):
+        """Active PolicySnapshot"""
+        return self._active[0]
+
+    def engine(self):
+        """Shared DecisionEngine compiled for the active snapshot"""
+        return self._active[1]
+
+    def get(self, version):
+        """A recently published snapshot by version, or None"""
+        for snapshot in reversed(self._history):
+            if snapshot.version == version:
+                return snapshot
+        return None
+
+    def publish(self, snapshot):
+        """Compile and atomically activate a snapshot"""
+        engine = DecisionEngine(snapshot)
+        with self._lock:
+            self._active = (snapshot, engine)
+            self._history = (self._history + [snapshot])[-self.HISTORY_SIZE:]
+        return snapshot
+
+    def load_file(self, path):
+        """Load and activate a JSON policy file"""
+        with open(path) as f:
+            data = json.load(f)
+        return self.publish(PolicySnapshot.from_dict(data, source=path))
+
+    def load_from_db(self):
+        """Activate the newest active DecisionPolicy row; needs an app context"""
+        from models import DecisionPolicy
+
+        record = DecisionPolicy.query.filter_by(is_active=True) \
+            .order_by(DecisionPolicy.created_at.desc(), DecisionPolicy.id.desc()).first()
+        if not record:
+            return None
+        if record.version == self.current().version:
+            return self.current()
+        return self.publish(PolicySnapshot.from_dict(record.data_json, source='database'))
+
+    def save_to_db(self, snapshot):
+        """Store a snapshot as a new DecisionPolicy row; needs an app context"""
+        from database import db
+        from models import DecisionPolicy
+
+        record = DecisionPolicy(version=snapshot.version, is_active=True)
+        record.data_json = snapshot.to_dict()
+        db.session.add(record)
+        db.session.commit()
+        return record
+
+
+# Shared by all request handlers in this process
+policy_registry = PolicyRegistry()
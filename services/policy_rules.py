@@ -0,0 +1,252 @@
+import numpy as np
+
+# Policy checks in evaluation order; bit i of a failure mask is CHECKS[i]
+CHECKS = ('age_maturity', 'min_income', 'min_tenure', 'min_credit', 'dti', 'ltv', 'max_tenure')
+
+# Rough cost of each check including the metric it needs (microseconds), used
+# to order fast-reject checks until measured costs are available
+CHECK_COST_PRIORS_US = {'min_income': 0.2, 'min_tenure': 0.1, 'min_credit': 0.1, 'max_tenure': 0.1,
+                        'age_maturity': 1.5, 'ltv': 1.0, 'dti': 3.0}
+
+# Threshold keys compiled into per-loan-type tables
+THRESHOLD_KEYS = ('min_income', 'max_dti', 'max_ltv', 'min_credit', 'min_tenure_years',
+                  'max_tenure_years', 'min_age', 'max_age')
+
+
+def format_check_message(check, value, threshold):
+    """Human-readable message for a failed policy check"""
+    if check == 'age_maturity':
+        if value < threshold:
+            return f"Age at maturity ({value}) is below minimum ({threshold})"
+        return f"Age at maturity ({value}) exceeds maximum ({threshold})"
+    if check == 'min_income':
+        return f"Monthly income (₹{value:,.0f}) is below minimum (₹{threshold:,.0f})"
+    if check == 'min_tenure':
+        return f"Employment tenure ({value} years) is below minimum ({threshold} years)"
+    if check == 'min_credit':
+        return f"Credit score ({value}) is below minimum ({threshold})"
+    if check == 'dti':
+        return f"Debt-to-Income ratio ({value:.1%}) exceeds maximum ({threshold:.1%})"
+    if check == 'ltv':
+        return f"Loan-to-Value ratio ({value:.1%}) exceeds maximum ({threshold:.1%})"
+    if check == 'max_tenure':
+        return f"Loan tenure ({value} years) exceeds maximum ({threshold} years)"
+    return f"{check} check failed"
+
+
+class FailedCheck:
+    """
+    A failed policy check: compact code, value and threshold
+
+    The message is only formatted when it is read. Supports dict-style access
+    ('check', 'value', 'threshold', 'message') like the old failure dicts.
+    """
+
+    __slots__ = ('check', 'value', 'threshold', 'borderline', '_message')
+
+    def __init__(self, check, value, threshold, borderline=False):
+        self.check = check
+        self.value = value
+        self.threshold = threshold
+        self.borderline = borderline
+        self._message = None
+
+    @property
+    def code(self):
+        """Bit index of this check in CHECKS"""
+        return CHECKS.index(self.check)
+
+    @property
+    def message(self):
+        if self._message is None:
+            self._message = format_check_message(self.check, self.value, self.threshold)
+        return self._message
+
+    def __getitem__(self, key):
+        if key in ('check', 'value', 'threshold', 'message'):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return {
+            'check': self.check,
+            'value': self.value,
+            'threshold': self.threshold,
+            'message': self.message
+        }
+
+    def __repr__(self):
+        return f'<FailedCheck {self.check} {self.value!r} vs {self.threshold!r}>'
+
+
+class PolicyRules:
+    """Policy thresholds for one loan type, compiled once into ordered checks"""
+
+    __slots__ = ('loan_type', 'policy') + THRESHOLD_KEYS + (
+        'dti_borderline_limit', 'ltv_borderline_limit', 'credit_borderline_limit')
+
+    def __init__(self, loan_type, policy, dti_tolerance, ltv_tolerance, credit_tolerance):
+        self.loan_type = loan_type
+        self.policy = policy
+        for key in THRESHOLD_KEYS:
+            setattr(self, key, policy.get(key))
+
+        # Failures at or inside these limits are borderline rather than hard
+        self.dti_borderline_limit = self.max_dti + dti_tolerance
+        self.ltv_borderline_limit = self.max_ltv + ltv_tolerance if self.max_ltv else None
+        self.credit_borderline_limit = self.min_credit - credit_tolerance
+
+    def evaluate(self, age_at_maturity, total_income, employment_tenure_years,
+                 credit_score, dti, ltv, tenure_years):
+        """Run all checks in CHECKS order and return the list of FailedCheck"""
+        failed = []
+
+        if age_at_maturity < self.min_age:
+            failed.append(FailedCheck('age_maturity', age_at_maturity, self.min_age))
+        elif age_at_maturity > self.max_age:
+            failed.append(FailedCheck('age_maturity', age_at_maturity, self.max_age))
+
+        if self.min_income > 0 and total_income < self.min_income:
+            failed.append(FailedCheck('min_income', total_income, self.min_income))
+
+        if employment_tenure_years < self.min_tenure_years:
+            failed.append(FailedCheck('min_tenure', employment_tenure_years, self.min_tenure_years))
+
+        if credit_score < self.min_credit:
+            failed.append(FailedCheck('min_credit', credit_score, self.min_credit,
+                                      credit_score >= self.credit_borderline_limit))
+
+        if dti > self.max_dti:
+            failed.append(FailedCheck('dti', dti, self.max_dti, dti <= self.dti_borderline_limit))
+
+        if self.max_ltv and ltv and ltv > self.max_ltv:
+            failed.append(FailedCheck('ltv', ltv, self.max_ltv, ltv <= self.ltv_borderline_limit))
+
+        if self.max_tenure_years is not None and tenure_years > self.max_tenure_years:
+            failed.append(FailedCheck('max_tenure', tenure_years, self.max_tenure_years))
+
+        return failed
+
+    def check(self, check, value):
+        """Run one check on its input value (same conditions as evaluate); FailedCheck or None"""
+        if check == 'age_maturity':
+            if value < self.min_age:
+                return FailedCheck('age_maturity', value, self.min_age)
+            if value > self.max_age:
+                return FailedCheck('age_maturity', value, self.max_age)
+        elif check == 'min_income':
+            if self.min_income > 0 and value < self.min_income:
+                return FailedCheck('min_income', value, self.min_income)
+        elif check == 'min_tenure':
+            if value < self.min_tenure_years:
+                return FailedCheck('min_tenure', value, self.min_tenure_years)
+        elif check == 'min_credit':
+            if value < self.min_credit:
+                return FailedCheck('min_credit', value, self.min_credit, value >= self.credit_borderline_limit)
+        elif check == 'dti':
+            if value > self.max_dti:
+                return FailedCheck('dti', value, self.max_dti, value <= self.dti_borderline_limit)
+        elif check == 'ltv':
+            if self.max_ltv and value and value > self.max_ltv:
+                return FailedCheck('ltv', value, self.max_ltv, value <= self.ltv_borderline_limit)
+        elif check == 'max_tenure':
+            if self.max_tenure_years is not None and value > self.max_tenure_years:
+                return FailedCheck('max_tenure', value, self.max_tenure_years)
+        return None
+
+
+class CheckSelectivity:
+    """
+    Running selectivity and cost counters for one loan type's checks
+
+    Fast-reject mode runs checks in `order`: ascending expected cost per hard
+    rejection (mean cost / hard-reject rate), the usual ordering for a chain
+    of filters. Only one call in TIMING_SAMPLE is counted and timed, so the
+    other calls pay nothing for the bookkeeping; counters are smoothed
+    towards CHECK_COST_PRIORS_US and PRIOR_REJECT_RATE, and the order is
+    recomputed every REORDER_INTERVAL calls. Counts are unsynchronized, so
+    they are approximate under concurrent use.
+    """
+
+    REORDER_INTERVAL = 256
+    TIMING_SAMPLE = 16
+    PRIOR_WEIGHT = 20
+    PRIOR_REJECT_RATE = 0.05
+
+    def __init__(self):
+        self.calls = 0
+        self.evaluated = dict.fromkeys(CHECKS, 0)
+        self.failed = dict.fromkeys(CHECKS, 0)
+        self.hard_failed = dict.fromkeys(CHECKS, 0)
+        self.timed = dict.fromkeys(CHECKS, 0)
+        self.time_ns = dict.fromkeys(CHECKS, 0)
+        self.order = self._ranked()
+
+    def start(self):
+        """Count a call and return whether its checks should be sampled (counted and timed)"""
+        self.calls += 1
+        if self.calls % self.REORDER_INTERVAL == 0:
+            self.order = self._ranked()
+        return self.calls % self.TIMING_SAMPLE == 0
+
+    def record(self, check, failure, elapsed_ns=None):
+        self.evaluated[check] += 1
+        if failure is not None:
+            self.failed[check] += 1
+            if not failure.borderline:
+                self.hard_failed[check] += 1
+        if elapsed_ns is not None:
+            self.timed[check] += 1
+            self.time_ns[check] += elapsed_ns
+
+    def mean_cost_us(self, check):
+        return (CHECK_COST_PRIORS_US[check] * self.PRIOR_WEIGHT + self.time_ns[check] / 1000) / \
+            (self.PRIOR_WEIGHT + self.timed[check])
+
+    def reject_rate(self, check):
+        return (self.PRIOR_REJECT_RATE * self.PRIOR_WEIGHT + self.hard_failed[check]) / \
+            (self.PRIOR_WEIGHT + self.evaluated[check])
+
+    def _ranked(self):
+        return sorted(CHECKS, key=lambda check: self.mean_cost_us(check) / self.reject_rate(check))
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'order': list(self.order),
+            'checks': {
+                check: {
+                    'evaluated': self.evaluated[check],
+                    'failed': self.failed[check],
+                    'hard_failed': self.hard_failed[check],
+                    'hard_reject_rate': round(self.hard_failed[check] / self.evaluated[check], 4)
+                    if self.evaluated[check] else None,
+                    'mean_cost_us': round(self.mean_cost_us(check), 2)
+                }
+                for check in CHECKS
+            }
+        }
+
+
+def compile_policies(policies, dti_tolerance, ltv_tolerance, credit_tolerance):
+    """
+    Compile a POLICIES dict into per-loan-type PolicyRules plus threshold
+    arrays (one entry per loan type, NaN where a threshold does not apply)
+    for the vectorized batch path
+    """
+    rules = {
+        loan_type: PolicyRules(loan_type, policy, dti_tolerance, ltv_tolerance, credit_tolerance)
+        for loan_type, policy in policies.items()
+    }
+    table = {
+        key: np.array([np.nan if policy.get(key) is None else policy[key]
+                       for policy in policies.values()], dtype=float)
+        for key in THRESHOLD_KEYS
+    }
+    return rules, list(policies), table
@@ -0,0 +1,286 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+from sqlalchemy import bindparam, select
+
+from .decision_engine import DecisionEngine
+from .decision_record import pack_decision
+from .policy_registry import PolicySnapshot, policy_registry
+
+# Columns read for each application and its user
+APPLICATION_COLUMNS = ('id', 'loan_type', 'amount_requested', 'tenure_years', 'down_payment',
+                       'property_value', 'decision', 'decision_reason', 'approval_probability',
+                       'policy_version')
+USER_COLUMNS = ('monthly_income', 'other_monthly_income', 'existing_emi', 'other_monthly_obligations',
+                'credit_score', 'employment_tenure_years', 'dob')
+
+# Decision engine of a pool worker process, built once by _init_worker
+_worker_engine = None
+
+
+def _init_worker(snapshot_data):
+    global _worker_engine
+    _worker_engine = DecisionEngine(PolicySnapshot.from_dict(snapshot_data, source='rescore'))
+
+
+def _row_objects(row):
+    """Lightweight Application and User stand-ins for the engine"""
+    application = SimpleNamespace(
+        loan_type=row['loan_type'],
+        amount_requested=row['amount_requested'],
+        tenure_years=row['tenure_years'],
+        down_payment=row['down_payment'] or 0,
+        property_value=row['property_value']
+    )
+    user = SimpleNamespace(
+        total_monthly_income=row['monthly_income'] + (row['other_monthly_income'] or 0),
+        total_monthly_liabilities=(row['existing_emi'] or 0) + (row['other_monthly_obligations'] or 0),
+        existing_emi=row['existing_emi'] or 0,
+        other_monthly_obligations=row['other_monthly_obligations'] or 0,
+        credit_score=row['credit_score'],
+        employment_tenure_years=row['employment_tenure_years'],
+        dob=row['dob']
+    )
+    return application, user
+
+
+def _decide_rows(rows):
+    """Full decision (reason and suggestions included) for each row; runs in a pool worker"""
+    results = []
+    for row in rows:
+        decision = _worker_engine.evaluate_application(*_row_objects(row))
+        results.append({
+            'row_id': row['id'],
+            'decision': decision['status'],
+            'decision_reason': decision['reason'],
+            'approval_probability': decision['probability'],
+            'suggestions': json.dumps(decision['suggestions']),
+            'policy_version': decision['policy_version'],
+            'decision_details': pack_decision(decision)
+        })
+    return results
+
+
+class PortfolioRescorer:
+    """
+    Re-decide applications after a decision policy change
+
+    Applications are read in primary-key order, one chunk at a time, joined
+    with their users. Rows already decided under the new policy version are
+    skipped. The others are scored under the new policy with evaluate_batch,
+    and a row is only stamped with the new policy_version when that result
+    still matches what is stored: same status, reason and probability (inputs
+    such as age at maturity move with the calendar), and, if its loan type's
+    effective policy changed, no failed check, so the stored suggestions are
+    still right too. Only the remaining rows get a full decision on a process
+    pool. Each chunk's results and stamps are written back in one
+    transaction.
+    """
+
+    def __init__(self, snapshot, chunk_size=1000, workers=None, status='pending',
+                 force=False, dry_run=False, report=print):
+        """
+        Args:
+            snapshot: PolicySnapshot to re-decide with
+            chunk_size: Applications read and written per transaction
+            workers: Pool processes (0 or 1 decides in this process)
+            status: Application status to re-decide
+            force: Re-decide every row instead of skipping unaffected ones
+            dry_run: Decide but do not write anything back
+            report: Callable receiving progress lines
+        """
+        self.snapshot = snapshot
+        self.engine = DecisionEngine(snapshot)
+        self.chunk_size = chunk_size
+        self.workers = os.cpu_count() if workers is None else workers
+        self.status = status
+        self.force = force
+        self.dry_run = dry_run
+        self.report = report
+        self._baselines = {snapshot.version: self.engine}
+        self.counts = {'scanned': 0, 'redecided': 0, 'changed': 0, 'current': 0, 'unaffected': 0}
+
+    def run(self):
+        """Re-decide every matching application; needs an app context. Returns the summary dict."""
+        started = time.perf_counter()
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                           initargs=(self.snapshot.to_dict(),))
+        else:
+            _init_worker(self.snapshot.to_dict())
+
+        # One chunk is decided in the pool while the next one is read and classified
+        in_flight = deque()
+        try:
+            for rows in self._read_chunks():
+                affected, stamped = self._classify(rows)
+                in_flight.append((rows, self._submit(executor, affected), stamped))
+                if len(in_flight) > 1:
+                    self._finish(*in_flight.popleft(), started)
+            while in_flight:
+                self._finish(*in_flight.popleft(), started)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - started
+        return dict(self.counts, seconds=round(elapsed, 2),
+                    rows_per_second=round(self.counts['scanned'] / elapsed, 1) if elapsed else 0.0)
+
+    def _read_chunks(self):
+        """Yield applications with their user's columns as lists of dicts, chunk_size at a time"""
+        from database import db
+        from models import Application, User
+
+        columns = [getattr(Application, name) for name in APPLICATION_COLUMNS] + \
+                  [getattr(User, name) for name in USER_COLUMNS]
+        names = APPLICATION_COLUMNS + USER_COLUMNS
+        last_id = 0
+        while True:
+            # Keyset pagination: each chunk is its own short read, so writes between chunks never wait on it
+            query = select(*columns).join(User, User.id == Application.user_id).where(
+                Application.status == self.status, Application.id > last_id
+            ).order_by(Application.id).limit(self.chunk_size)
+            rows = [dict(zip(names, values)) for values in db.session.execute(query)]
+            db.session.rollback()
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            yield rows
+
+    def _classify(self, rows):
+        """Split a chunk into rows to re-decide and ids to stamp with the new version"""
+        self.counts['scanned'] += len(rows)
+        if self.force:
+            return rows, []
+
+        affected, stamped, by_version = [], [], {}
+        for row in rows:
+            if row['decision'] is None:
+                affected.append(row)
+            elif row['policy_version'] == self.snapshot.version:
+                self.counts['current'] += 1
+            else:
+                by_version.setdefault(row['policy_version'], []).append(row)
+
+        for version, group in by_version.items():
+            baseline = self._baseline_engine(version)
+            if baseline is None:
+                affected.extend(group)
+                continue
+
+            changed = [self._policy_changed(baseline, row['loan_type']) for row in group]
+            for row, unaffected in zip(group, self._still_current(group, changed)):
+                if unaffected:
+                    stamped.append(row['id'])
+                else:
+                    affected.append(row)
+
+        self.counts['unaffected'] += len(stamped)
+        return affected, stamped
+
+    def _baseline_engine(self, version):
+        """Engine for the policy version a row was decided under, or None if it is unknown"""
+        if version not in self._baselines:
+            snapshot = policy_registry.get(version)
+            if snapshot is None and version == 'builtin':
+                snapshot = PolicySnapshot.builtin()
+            if snapshot is None and version:
+                from models import DecisionPolicy
+
+                record = DecisionPolicy.query.filter_by(version=version).first()
+                if record:
+                    snapshot = PolicySnapshot.from_dict(record.data_json, source='database')
+            self._baselines[version] = DecisionEngine(snapshot) if snapshot else None
+        return self._baselines[version]
+
+    def _policy_changed(self, baseline, loan_type):
+        """Whether anything deciding this loan type differs between baseline and the new engine"""
+        new = self.engine
+        if (baseline.DTI_TOLERANCE, baseline.LTV_TOLERANCE, baseline.CREDIT_TOLERANCE, baseline.SCORING_WEIGHTS) != \
+                (new.DTI_TOLERANCE, new.LTV_TOLERANCE, new.CREDIT_TOLERANCE, new.SCORING_WEIGHTS):
+            return True
+        return baseline.POLICIES.get(loan_type, baseline.POLICIES['personal']) != \
+            new.POLICIES.get(loan_type, new.POLICIES['personal'])
+
+    def _still_current(self, rows, policy_changed):
+        """Rows whose stored decision is what the new policy decides today"""
+        frame = {
+            'amount': [row['amount_requested'] for row in rows],
+            'tenure': [row['tenure_years'] for row in rows],
+            'loan_type': [row['loan_type'] for row in rows],
+            'income': [row['monthly_income'] + (row['other_monthly_income'] or 0) for row in rows],
+            'existing_emi': [row['existing_emi'] or 0 for row in rows],
+            'other_obligations': [row['other_monthly_obligations'] for row in rows],
+            'credit_score': [row['credit_score'] for row in rows],
+            'employment_tenure': [row['employment_tenure_years'] for row in rows],
+            'dob': [row['dob'] for row in rows],
+            'property_value': [row['property_value'] for row in rows],
+            'down_payment': [row['down_payment'] for row in rows]
+        }
+        new = self.engine.evaluate_batch(frame, with_reasons=True)
+        return [
+            status == row['decision'] and reason == row['decision_reason'] and
+            probability == row['approval_probability'] and not (changed and failed)
+            for row, changed, status, reason, probability, failed in zip(
+                rows, policy_changed, new['status'], new['reason'], new['probability'], new['failed_checks'])
+        ]
+
+    def _submit(self, executor, rows):
+        """Start deciding rows; returns futures (or finished results without a pool)"""
+        if not rows:
+            return []
+        if executor is None:
+            return [_decide_rows(rows)]
+        # A few batches per worker keeps the pool busy without pickling one row at a time
+        batches = max(1, min(len(rows) // 50, self.workers * 4))
+        size = -(-len(rows) // batches)
+        return [executor.submit(_decide_rows, rows[start:start + size]) for start in range(0, len(rows), size)]
+
+    def _finish(self, rows, pending, stamped, started):
+        """Collect a chunk's decisions, write them in one transaction and report progress"""
+        results = [result for batch in pending
+                   for result in (batch if isinstance(batch, list) else batch.result())]
+        previous = {row['id']: row['decision'] for row in rows}
+        self.counts['redecided'] += len(results)
+        self.counts['changed'] += sum(1 for result in results if result['decision'] != previous[result['row_id']])
+
+        if not self.dry_run:
+            self._write(results, stamped)
+
+        elapsed = time.perf_counter() - started
+        self.report(f"{self.counts['scanned']:,} scanned, {self.counts['redecided']:,} re-decided "
+                    f"({self.counts['changed']:,} changed), "
+                    f"{self.counts['current'] + self.counts['unaffected']:,} skipped - "
+                    f"{self.counts['scanned'] / elapsed:,.0f} rows/s")
+
+    def _write(self, results, stamped):
+        from database import db
+        from models import Application
+
+        table = Application.__table__
+        try:
+            if results:
+                db.session.execute(
+                    table.update().where(table.c.id == bindparam('row_id')).values(
+                        decision=bindparam('decision'),
+                        decision_reason=bindparam('decision_reason'),
+                        approval_probability=bindparam('approval_probability'),
+                        suggestions=bindparam('suggestions'),
+                        policy_version=bindparam('policy_version'),
+                        decision_details=bindparam('decision_details')
+                    ),
+                    results
+                )
+            if stamped:
+                db.session.execute(table.update().where(table.c.id.in_(stamped))
+                                   .values(policy_version=self.snapshot.version))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
@@ -0,0 +1,101 @@
+import threading
+
+
+class _Flight:
+    """One in-progress call that later callers with the same key wait on"""
+
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+    def wait(self, timeout=None):
+        """
+        The leader's result; re-raises its exception
+
+        Raises:
+            TimeoutError: The leader did not finish within timeout seconds
+        """
+        if not self.done.wait(timeout):
+            raise TimeoutError('Timed out waiting for the in-flight call')
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one
+
+    The first caller for a key (the leader) runs the call, and callers that
+    arrive while it is in flight wait for and share its result or exception.
+    Nothing is kept after the call finishes; caching is left to the caller.
+    Every follower is an upstream call saved, counted in `coalesced`.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, func, timeout=None):
+        """
+        func() once per concurrent group of callers with this key
+
+        Followers wait at most timeout seconds for the leader (TimeoutError).
+        """
+        flight, leader = self.join(key)
+        if not leader:
+            return flight.wait(timeout)
+        try:
+            result = func()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result)
+        return result
+
+    def join(self, key):
+        """
+        Join the flight for key, starting one if none is in progress
+
+        Returns:
+            (flight, leader): a leader must call finish() exactly once;
+            followers call flight.wait(timeout)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.calls += 1
+            return flight, True
+
+    def finish(self, key, flight, result=None, error=None):
+        """Publish the leader's result (or exception) to its followers"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.error = error
+        flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            requests = self.calls + self.coalesced
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._flights),
+                'saved_ratio': round(self.coalesced / requests, 4) if requests else 0.0
+            }
+
+
+# Coalesces identical Gemini insights prompts across the threads of this process
+insights_flight = SingleFlight()
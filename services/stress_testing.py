@@ -0,0 +1,245 @@
+import time
+from itertools import product
+
+import numpy as np
+
+from .decision_engine import DecisionEngine
+
+# Application statuses that make up the book by default
+BOOK_STATUSES = ('approved', 'pending')
+
+
+class LoanBook:
+    """Columnar loan book: one array entry per loan, with its borrower's income and obligations"""
+
+    def __init__(self, loan_type, amount, tenure_years, interest_rate, income, obligations):
+        self.loan_type = np.asarray(loan_type, dtype=str)
+        self.amount = np.asarray(amount, dtype=float)
+        self.tenure_years = np.asarray(tenure_years, dtype=float)
+        self.interest_rate = np.asarray(interest_rate, dtype=float)
+        self.income = np.asarray(income, dtype=float)
+        self.obligations = np.asarray(obligations, dtype=float)
+
+    def __len__(self):
+        return len(self.amount)
+
+    @classmethod
+    def from_database(cls, statuses=BOOK_STATUSES, default_rate=7.5, chunk_size=50000):
+        """
+        Load applications in the given statuses with their users; needs an app context
+
+        Rows are read in id order, chunk_size at a time, and only the
+        columns the stress test needs are kept (as arrays).
+        """
+        from sqlalchemy import select
+        from database import db
+        from models import Application, User
+
+        columns = (Application.id, Application.loan_type, Application.amount_requested,
+                   Application.tenure_years, Application.interest_rate, User.monthly_income,
+                   User.other_monthly_income, User.existing_emi, User.other_monthly_obligations)
+        chunks = []
+        last_id = 0
+        while True:
+            query = select(*columns).join(User, User.id == Application.user_id).where(
+                Application.status.in_(statuses), Application.id > last_id
+            ).order_by(Application.id).limit(chunk_size)
+            rows = db.session.execute(query).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            loan_type, amount, tenure, rate, income, other_income, emi, other_obligations = zip(
+                *(row[1:] for row in rows))
+            chunks.append((
+                np.array(loan_type, dtype=str),
+                np.array(amount, dtype=float),
+                np.array(tenure, dtype=float),
+                np.array([default_rate if value is None else value for value in rate], dtype=float),
+                np.array(income, dtype=float) + np.array([value or 0 for value in other_income], dtype=float),
+                np.array([value or 0 for value in emi], dtype=float) +
+                np.array([value or 0 for value in other_obligations], dtype=float)
+            ))
+
+        if not chunks:
+            return cls([], [], [], [], [], [])
+        return cls(*(np.concatenate(column) for column in zip(*chunks)))
+
+
+class ShockScenarios:
+    """Stress scenarios: a rate shock in basis points and an income change (-0.1 = 10% drop) each"""
+
+    def __init__(self, rate_shock_bps, income_change, names=None):
+        self.rate_shock_bps = np.asarray(rate_shock_bps, dtype=float)
+        self.income_change = np.broadcast_to(np.asarray(income_change, dtype=float),
+                                             self.rate_shock_bps.shape).copy()
+        self.names = list(names) if names is not None else None
+
+    def __len__(self):
+        return len(self.rate_shock_bps)
+
+    @classmethod
+    def scripted(cls, rate_shocks_bps=(0, 100, 200, 300), income_changes=(0.0, -0.10, -0.20)):
+        """Every combination of the given rate shocks and income changes"""
+        pairs = list(product(rate_shocks_bps, income_changes))
+        names = [f'+{bps:g}bps, income {change:+.0%}' for bps, change in pairs]
+        return cls([bps for bps, _ in pairs], [change for _, change in pairs], names)
+
+    @classmethod
+    def monte_carlo(cls, count=1000, rate_shock_bps=(100, 300), income_change_mean=-0.05,
+                    income_change_std=0.05, seed=None):
+        """Random scenarios: uniform rate shocks, normally distributed income changes (capped at -90%)"""
+        rng = np.random.default_rng(seed)
+        rate_shocks = rng.uniform(rate_shock_bps[0], rate_shock_bps[1], count)
+        income_changes = np.maximum(-0.9, rng.normal(income_change_mean, income_change_std, count))
+        return cls(rate_shocks, income_changes)
+
+    def describe(self, index):
+        return {
+            'index': int(index),
+            'name': self.names[index] if self.names else None,
+            'rate_shock_bps': round(float(self.rate_shock_bps[index]), 1),
+            'income_change': round(float(self.income_change[index]), 4)
+        }
+
+
+class StressTester:
+    """
+    Vectorized rate-shock and income-shock stress test of a LoanBook
+
+    Each loan is re-checked under every scenario against its loan type's
+    DecisionEngine thresholds: DTI (with the engine's 3-decimal rounding and
+    borderline tolerance) and minimum income, the checks that rates and
+    incomes move. Loans are grouped by type, EMIs come from annuity factors
+    per distinct (rate, tenure) and scenario, and the loan x scenario matrix
+    is processed in blocks of at most max_block_cells so memory stays bounded
+    for any book size. EMIs use the original amount and tenure, i.e. the whole
+    loan reprices at the shocked rate.
+    """
+
+    def __init__(self, engine=None, max_block_cells=2_000_000, income_volatility=0.0, seed=None):
+        """
+        Args:
+            engine: DecisionEngine whose policies apply (built-in policies by default)
+            max_block_cells: Loans x scenarios evaluated per block
+            income_volatility: Std dev of an extra per-loan, per-scenario income shock
+            seed: Seed for the per-loan income shocks
+        """
+        self.engine = engine or DecisionEngine()
+        self.max_block_cells = max_block_cells
+        self.income_volatility = income_volatility
+        self.seed = seed
+
+    def run(self, book, scenarios, keep_scenarios=False):
+        """
+        Stress every loan in the book under every scenario
+
+        Returns:
+            dict with per-loan-type and portfolio breach rates: the no-shock
+            baseline, and the mean, p95 and worst scenario across scenarios
+            of dti_breach_rate (DTI over limit), partial_rate (borderline
+            only), income_breach_rate and reject_rate (hard DTI or income
+            failure). With keep_scenarios, per-scenario rates per type too.
+        """
+        started = time.perf_counter()
+        rng = np.random.default_rng(self.seed)
+        rate_shocks = scenarios.rate_shock_bps / 100
+        income_multiplier = 1 + scenarios.income_change
+
+        loan_types, type_index, type_counts = np.unique(book.loan_type, return_inverse=True, return_counts=True)
+        order = np.argsort(type_index, kind='stable')
+        boundaries = np.concatenate([[0], np.cumsum(type_counts)])
+
+        by_loan_type = {}
+        totals = None
+        per_scenario = {}
+        for position, loan_type in enumerate(loan_types):
+            rows = order[boundaries[position]:boundaries[position + 1]]
+            counts = self._stress_type(book, rows, str(loan_type), rate_shocks, income_multiplier, rng)
+            by_loan_type[str(loan_type)] = self._summarize(counts, len(rows), scenarios)
+            if keep_scenarios:
+                per_scenario[str(loan_type)] = {key: value / len(rows) for key, value in counts.items()}
+            totals = counts if totals is None else {key: totals[key] + counts[key] for key in totals}
+
+        result = {
+            'loans': len(book),
+            'scenarios': len(scenarios),
+            'policy_version': self.engine.policy_version,
+            'by_loan_type': by_loan_type,
+            'portfolio': self._summarize(totals, len(book), scenarios) if totals else None,
+            'seconds': round(time.perf_counter() - started, 2)
+        }
+        if keep_scenarios:
+            result['per_scenario'] = per_scenario
+        return result
+
+    def _stress_type(self, book, rows, loan_type, rate_shocks, income_multiplier, rng):
+        """Breach counts per scenario (plus the no-shock baseline) for one loan type"""
+        engine = self.engine
+        policy = engine.POLICIES.get(loan_type, engine.POLICIES['personal'])
+        # round(dti, 3) > limit  <=>  dti >= limit + 0.0005
+        fail_limit = policy['max_dti'] + 0.0005
+        hard_limit = policy['max_dti'] + engine.DTI_TOLERANCE + 0.0005
+        min_income = policy['min_income'] or 0
+
+        amount = book.amount[rows]
+        obligations = book.obligations[rows]
+        income = book.income[rows]
+
+        # Annuity factor per distinct (rate, tenure) and scenario
+        keys, key_index = np.unique(np.stack([book.interest_rate[rows], book.tenure_years[rows]], axis=1),
+                                    axis=0, return_inverse=True)
+        key_index = key_index.ravel()
+        factors = engine.calculator.annuity_factor_batch(keys[:, :1] + rate_shocks[None, :], keys[:, 1:])
+
+        counts = {name: np.zeros(len(rate_shocks) + 1, dtype=np.int64)
+                  for name in ('dti_breach', 'partial', 'income_breach', 'reject')}
+
+        # Baseline (no shock) goes in the last slot
+        baseline_factors = engine.calculator.annuity_factor_batch(keys[:, 0], keys[:, 1])
+        self._count_block(counts, slice(-1, None), amount[:, None] * baseline_factors[key_index][:, None] +
+                          obligations[:, None], income[:, None], fail_limit, hard_limit, min_income)
+
+        scenario_step = max(1, min(len(rate_shocks), self.max_block_cells))
+        loan_step = max(1, self.max_block_cells // scenario_step)
+        for scenario_start in range(0, len(rate_shocks), scenario_step):
+            columns = slice(scenario_start, scenario_start + scenario_step)
+            multiplier = income_multiplier[columns][None, :]
+            for loan_start in range(0, len(rows), loan_step):
+                loans = slice(loan_start, loan_start + loan_step)
+                debt = factors[key_index[loans], columns]
+                debt *= amount[loans, None]
+                debt += obligations[loans, None]
+                shocked_income = income[loans, None] * multiplier
+                if self.income_volatility:
+                    shocked_income *= np.maximum(0, 1 + rng.normal(0, self.income_volatility, shocked_income.shape))
+                self._count_block(counts, columns, debt, shocked_income, fail_limit, hard_limit, min_income)
+
+        return counts
+
+    @staticmethod
+    def _count_block(counts, columns, debt, income, fail_limit, hard_limit, min_income):
+        dti_breach = debt >= fail_limit * income
+        hard_breach = debt >= hard_limit * income
+        income_breach = income < min_income if min_income > 0 else np.zeros_like(dti_breach)
+        reject = hard_breach | income_breach
+
+        counts['dti_breach'][columns] += np.count_nonzero(dti_breach, axis=0)
+        counts['income_breach'][columns] += np.count_nonzero(income_breach, axis=0)
+        counts['reject'][columns] += np.count_nonzero(reject, axis=0)
+        counts['partial'][columns] += np.count_nonzero(dti_breach & ~reject, axis=0)
+
+    @staticmethod
+    def _summarize(counts, loans, scenarios):
+        summary = {'loans': loans, 'baseline': {}}
+        for name, values in counts.items():
+            rates = values[:-1] / loans
+            summary['baseline'][f'{name}_rate'] = round(float(values[-1] / loans), 4)
+            summary[f'{name}_rate'] = {
+                'mean': round(float(rates.mean()), 4),
+                'p95': round(float(np.percentile(rates, 95)), 4),
+                'max': round(float(rates.max()), 4)
+            }
+        reject_rates = counts['reject'][:-1]
+        summary['worst_scenario'] = dict(scenarios.describe(int(reject_rates.argmax())),
+                                         reject_rate=round(float(reject_rates.max() / loans), 4))
+        return summary
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Rate-shock and income-shock stress test of the approved and pending loan book
+
+Usage:
+    python stress_test.py                                   # 1,000 Monte Carlo scenarios, +100-300 bps
+    python stress_test.py --scripted                        # +0/100/200/300 bps x income 0/-10/-20%
+    python stress_test.py --scenarios 5000 --income-mean -0.1 --json
+"""
+
+import argparse
+import json
+import sys
+from app import app, load_decision_policies
+from services.policy_registry import policy_registry
+from services.stress_testing import BOOK_STATUSES, LoanBook, ShockScenarios, StressTester
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Stress test the loan book against rate and income shocks')
+    parser.add_argument('--scripted', action='store_true', help='Use the scripted scenario grid instead of Monte Carlo')
+    parser.add_argument('--scenarios', type=int, default=1000, help='Monte Carlo scenario count')
+    parser.add_argument('--rate-min-bps', type=float, default=100, help='Smallest random rate shock (bps)')
+    parser.add_argument('--rate-max-bps', type=float, default=300, help='Largest random rate shock (bps)')
+    parser.add_argument('--income-mean', type=float, default=-0.05, help='Mean income change (-0.05 = 5%% drop)')
+    parser.add_argument('--income-std', type=float, default=0.05, help='Std dev of the income change')
+    parser.add_argument('--income-volatility', type=float, default=0.0, help='Extra per-loan income shock std dev')
+    parser.add_argument('--status', action='append', help=f'Application status to include (default: {", ".join(BOOK_STATUSES)})')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    parser.add_argument('--json', action='store_true', help='Print the full result as JSON')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.scripted:
+        scenarios = ShockScenarios.scripted()
+    else:
+        scenarios = ShockScenarios.monte_carlo(args.scenarios, (args.rate_min_bps, args.rate_max_bps),
+                                               args.income_mean, args.income_std, args.seed)
+
+    with app.app_context():
+        load_decision_policies()
+        book = LoanBook.from_database(tuple(args.status or BOOK_STATUSES))
+
+    tester = StressTester(policy_registry.engine(), income_volatility=args.income_volatility, seed=args.seed)
+    result = tester.run(book, scenarios)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"{result['loans']:,} loans x {result['scenarios']:,} scenarios "
+          f"(policy {result['policy_version']}) in {result['seconds']}s")
+    print("=" * 72)
+    print("Reject rate (hard DTI or minimum income failure), no shock vs across scenarios:")
+    print(f"{'Loan type':<12}{'Loans':>9}{'Baseline':>10}{'Mean':>9}{'P95':>9}{'Worst':>9}")
+    rows = list(result['by_loan_type'].items())
+    if result['portfolio']:
+        rows.append(('portfolio', result['portfolio']))
+    for loan_type, summary in rows:
+        reject = summary['reject_rate']
+        print(f"{loan_type:<12}{summary['loans']:>9,}{summary['baseline']['reject_rate']:>10.1%}"
+              f"{reject['mean']:>9.1%}{reject['p95']:>9.1%}{reject['max']:>9.1%}")
+    if result['portfolio']:
+        worst = result['portfolio']['worst_scenario']
+        print(f"Worst scenario: +{worst['rate_shock_bps']:g} bps, income {worst['income_change']:+.1%}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""DecisionEngine batch and fast-reject paths against evaluate_application"""
+
+import pytest
+
+from benchmarks.bench_services import make_applications, make_frame, make_users
+from services.decision_engine import DecisionEngine
+from services.policy_rules import CHECKS
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return DecisionEngine()
+
+
+@pytest.fixture(scope='module')
+def portfolio():
+    users = make_users(2000, seed=3)
+    return make_applications(users, seed=3), users
+
+
+def test_evaluate_batch_matches_evaluate_application(engine, portfolio):
+    applications, users = portfolio
+    batch = engine.evaluate_batch(make_frame(applications, users))
+
+    for row, (application, user) in enumerate(zip(applications, users)):
+        decision = engine.evaluate_application(application, user)
+        failed_mask = sum(1 << CHECKS.index(check.check) for check in decision['failed_checks'])
+        assert batch['status'][row] == decision['status']
+        assert batch['probability'][row] == decision['probability']
+        assert batch['reason'][row] == decision['reason']
+        assert batch['failed_checks'][row] == failed_mask
+        assert batch['policy_version'] == decision['policy_version']
+
+
+def test_fast_reject_matches_full_decision(engine, portfolio):
+    applications, users = portfolio
+    for application, user in zip(applications, users):
+        full = engine.evaluate_application(application, user)
+        fast = dict(engine.evaluate_application(application, user, fast_reject=True))
+        assert fast['status'] == full['status']
+        assert fast['probability'] == full['probability']
+        if fast['fast_reject']:
+            assert fast['failed_checks'][0].check in [check.check for check in full['failed_checks']]
+        else:
+            assert fast['reason'] == full['reason']
+
+
+def test_max_approvable_terms_stay_within_offered_tenure(engine, portfolio):
+    applications, users = portfolio
+    for user in users[:200]:
+        for loan_type, offered in engine.MAX_OFFERED_TENURE_YEARS.items():
+            terms = engine.max_approvable_terms(user, loan_type, amounts=[500000])
+            assert len(terms['max_amount_by_tenure']) <= offered
+            min_tenure = terms['min_tenure_by_amount'][0]['min_tenure_years']
+            assert min_tenure is None or min_tenure <= offered
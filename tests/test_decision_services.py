@@ -0,0 +1,127 @@
+"""Smoke tests for the decision cache and the background decision job queue"""
+
+import json
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from database import db
+from models import Application, DecisionJob, User
+from services.decision_cache import DecisionCache
+from services.decision_engine import DecisionEngine
+from services.decision_worker import DecisionWorker
+
+
+def make_user(**overrides):
+    fields = dict(id=1, full_name='Test User', email='test@example.com', phone='9999999999',
+                  dob=date(1990, 1, 1), address='Street 1', monthly_income=80000.0,
+                  other_monthly_income=0.0, employment_type='salaried', employment_tenure_years=4.0,
+                  credit_score=720, existing_emi=5000.0, other_monthly_obligations=0.0,
+                  bank_id=1, password_hash='x')
+    fields.update(overrides)
+    return User(**fields)
+
+
+def make_application(**overrides):
+    fields = dict(user_id=1, bank_id=1, loan_type='personal', amount_requested=500000.0,
+                  tenure_years=5, down_payment=0.0, property_value=None)
+    fields.update(overrides)
+    return Application(**fields)
+
+
+def test_decision_cache_hits_and_invalidates():
+    cache = DecisionCache(max_size=2)
+    engine = DecisionEngine()
+    user, application = make_user(), make_application()
+
+    first = cache.evaluate(engine, application, user)
+    second = cache.evaluate(engine, application, user)
+
+    assert second == first
+    assert second == engine.evaluate_application(application, user)
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    # Results are copies, so callers cannot change the cached entry
+    second['status'] = 'CHANGED'
+    assert cache.evaluate(engine, application, user)['status'] == first['status']
+
+    assert cache.invalidate_user(user.id) == 1
+    cache.evaluate(engine, application, make_user(credit_score=500))
+    assert cache.stats()['misses'] == 2
+
+
+def test_decision_cache_evicts_and_expires():
+    cache = DecisionCache(max_size=2, ttl_seconds=60)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, 1, {'status': key})
+
+    assert cache.get('a') is None
+    assert cache.get('c') == {'status': 'c'}
+    assert cache.stats()['evictions'] == 1
+
+    cache.ttl_seconds = 0
+    cache.put('d', 2, {'status': 'd'})
+    assert cache.get('d') is None
+    assert cache.stats()['expirations'] == 1
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_decision_worker_decides_queued_applications(app):
+    worker = DecisionWorker()
+    worker._app = app
+    with app.app_context():
+        db.session.add(make_user())
+        approved = make_application()
+        rejected = make_application(amount_requested=9000000.0, tenure_years=2)
+        db.session.add_all([approved, rejected])
+        worker.enqueue(approved)
+        worker.enqueue(rejected)
+        db.session.commit()
+
+    assert worker.run_pending() == 2
+    assert worker.stats() == {'done': 2}
+    assert worker.run_pending() == 0
+
+    with app.app_context():
+        user = db.session.get(User, 1)
+        engine = DecisionEngine()
+        applications = Application.query.order_by(Application.id).all()
+        for application in applications:
+            expected = engine.evaluate_application(application, user)
+            assert application.decision == expected['status']
+            assert application.approval_probability == expected['probability']
+            assert json.loads(application.suggestions) == expected['suggestions']
+            assert application.decision_record is not None
+        assert [application.decision for application in applications] == ['APPROVED', 'REJECTED']
+
+
+def test_decision_worker_retries_then_gives_up(app, monkeypatch):
+    worker = DecisionWorker(max_attempts=2, retry_delay=0)
+    worker._app = app
+    with app.app_context():
+        db.session.add(make_user())
+        application = make_application()
+        db.session.add(application)
+        worker.enqueue(application)
+        db.session.commit()
+
+    failing = SimpleNamespace(evaluate=lambda *args: (_ for _ in ()).throw(RuntimeError('engine down')))
+    monkeypatch.setattr('services.decision_worker.decision_cache', failing)
+
+    worker.run_pending()
+    with app.app_context():
+        job = DecisionJob.query.one()
+        assert job.state == 'dead'
+        assert job.attempts == 2
+        assert job.last_error == 'RuntimeError: engine down'
@@ -0,0 +1,142 @@
+"""Batch and closed-form LoanCalculator methods against their scalar / loop versions"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from services.loan_calculator import LoanCalculator
+
+RATES = [0, 0.5, 6.5, 7.5, 8.2, 9.1, 10.25, 12, 18]
+
+
+@pytest.fixture
+def calculator():
+    return LoanCalculator()
+
+
+def random_loans(count, seed=7):
+    rng = random.Random(seed)
+    return [(float(rng.randrange(1000, 20000000, 100)), rng.choice(RATES), rng.randint(1, 30))
+            for _ in range(count)]
+
+
+def test_emi_batch_matches_scalar(calculator):
+    loans = random_loans(5000) + [(0, 7.5, 10), (-5000, 7.5, 10), (100000, 0, 1)]
+    principal, rate, tenure = map(list, zip(*loans))
+
+    emi = calculator.calculate_emi_batch(principal, rate, tenure)
+    total_interest = calculator.calculate_total_interest_batch(principal, rate, tenure)
+    total_payable = calculator.calculate_total_payable_batch(principal, rate, tenure)
+
+    for index, (p, r, t) in enumerate(loans):
+        assert emi[index] == calculator.calculate_emi(p, r, t)
+        assert total_interest[index] == calculator.calculate_total_interest(p, r, t)
+        assert total_payable[index] == calculator.calculate_total_payable(p, r, t)
+
+
+def test_emi_batch_broadcasts(calculator):
+    emi = calculator.calculate_emi_batch(2500000, [7.5, 8.2], [[10], [20]])
+
+    assert emi.shape == (2, 2)
+    assert emi[1, 0] == calculator.calculate_emi(2500000, 7.5, 20)
+
+
+def test_amortization_table_matches_loop(calculator):
+    for p, r, t in random_loans(300, seed=11):
+        table = calculator.generate_amortization_table(p, r, t)
+        assert table.to_list() == calculator.generate_amortization_schedule(p, r, t)
+
+
+def test_amortization_table_slicing_and_totals(calculator):
+    table = calculator.generate_amortization_table(2500000, 7.5, 30)
+    schedule = calculator.generate_amortization_schedule(2500000, 7.5, 30)
+
+    assert len(table) == 360
+    assert table[12] == schedule[12]
+    assert table[24:36].to_list() == schedule[24:36]
+    assert table.totals()['total_interest'] == round(sum(row['interest'] for row in schedule), 2)
+    assert calculator.generate_amortization_table(0, 7.5, 30).to_list() == []
+
+
+def test_schedule_row_and_page_within_a_paisa(calculator):
+    for p, r, t in random_loans(100, seed=13):
+        schedule = calculator.generate_amortization_schedule(p, r, t)
+        page = calculator.generate_amortization_page(p, r, t, offset=6, limit=12)
+        assert len(page) == min(12, len(schedule) - 6)
+        for expected, row in zip(schedule[6:18], page):
+            assert row['month'] == expected['month']
+            for column in ('payment', 'principal', 'interest', 'balance'):
+                assert row[column] == pytest.approx(expected[column], abs=0.0101)
+
+        month = len(schedule) // 2 + 1
+        row = calculator.schedule_row(p, r, t, month)
+        assert row['balance'] == pytest.approx(schedule[month - 1]['balance'], abs=0.0101)
+        assert calculator.schedule_row(p, r, t, len(schedule) + 1) is None
+
+
+def simulate_prepayments(calculator, principal, annual_rate_percent, tenure_years, events):
+    """Month-by-month reference for evaluate_prepayment_scenarios: (total paid, months)"""
+    monthly_rate = annual_rate_percent / 100 / 12
+    emi = calculator.calculate_emi(principal, annual_rate_percent, tenure_years)
+    term_end = tenure_years * 12
+    events = sorted(events, key=lambda event: event['month'])
+    balance, paid, month = float(principal), 0.0, 0
+
+    while balance >= 0.005:
+        month += 1
+        due = balance * (1 + monthly_rate)
+        if due <= emi:
+            return paid + due, month
+        balance = due - emi
+        paid += emi
+        for event in (e for e in events if e['month'] == month):
+            prepaid = min(event['amount'], balance)
+            balance -= prepaid
+            paid += prepaid
+            if balance < 0.005:
+                return paid, month
+            if event.get('mode') == 'reduce_emi' and term_end > month:
+                power_factor = (1 + monthly_rate) ** (term_end - month)
+                emi = balance * monthly_rate * power_factor / (power_factor - 1)
+            else:
+                months_left = -math.log1p(-balance * monthly_rate / emi) / math.log1p(monthly_rate)
+                term_end = month + math.ceil(months_left - 1e-9)
+    return paid, month
+
+
+def test_prepayment_scenarios_match_simulation(calculator):
+    rng = random.Random(17)
+    principal, rate, tenure = 3000000, 8.5, 20
+    scenarios = [[]]
+    for _ in range(40):
+        scenarios.append([
+            {'amount': float(rng.randrange(10000, 600000, 1000)),
+             'month': rng.randint(1, 200),
+             'mode': rng.choice(['reduce_tenure', 'reduce_emi'])}
+            for _ in range(rng.randint(1, 4))
+        ])
+
+    results = calculator.evaluate_prepayment_scenarios(principal, rate, tenure, scenarios)
+
+    assert results[0]['months'] == tenure * 12
+    assert results[0]['interest_saved'] == 0
+    for events, result in zip(scenarios, results):
+        paid, months = simulate_prepayments(calculator, principal, rate, tenure, events)
+        assert result['months'] == months
+        assert result['total_payable'] == pytest.approx(paid, abs=0.05)
+
+
+def test_eligibility_grid_matches_scalar(calculator):
+    rates = [0, 6.5, 8.2, 10.25]
+    tenures = [1, 5, 12, 20, 30]
+    for income, obligations, max_dti in ((85000, 12000, 0.5), (30000, 0, 0.4), (20000, 15000, 0.5)):
+        grid = calculator.eligibility_grid(income, obligations, rates, tenures, max_dti)
+        assert grid.shape == (len(rates), len(tenures))
+        for i, rate in enumerate(rates):
+            for j, tenure in enumerate(tenures):
+                assert grid[i, j] == calculator.calculate_loan_eligibility(
+                    income, obligations, rate, tenure, max_dti)
+
+    assert not np.any(calculator.eligibility_grid(0, 0, rates, tenures))